@@ -0,0 +1,55 @@
+# memory used by an MCTS tree per simulation.
+# Run with: python -m benchmarks.tree_memory
+
+import tracemalloc
+import chess
+import torch
+
+from mcts import complete_one_mcts
+
+# bytes the three dense 4672 float64 edge arrays cost for every node before the flat Tree store
+DENSE_BYTES_PER_NODE = 3 * 8*8*73 * 8
+
+
+def uniform_nnet(s):
+    """
+    Stand-in for ChessNet returning a flat policy and a value of 0 so that only the tree is measured.
+    """
+    batch_size = s.view(-1, 8*8*119).size(0)
+    return torch.zeros([batch_size, 8*8*73]), torch.zeros([batch_size, 1])
+
+
+def count_nodes(root):
+    nodes, count = [root], 0
+    while nodes:
+        node = nodes.pop()
+        count += 1
+        nodes.extend(node.children.values())
+    return count
+
+
+def measure(num_of_searches, batch_size=1):
+    tracemalloc.start()
+    _, root = complete_one_mcts(
+        num_of_searches, uniform_nnet, chess.Board(), batch_size)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    num_of_nodes = count_nodes(root)
+    return {
+        "simulations": num_of_searches,
+        "nodes": num_of_nodes,
+        "edges": len(root.tree),
+        "bytes_per_simulation": current / num_of_searches,
+        "edge_bytes_per_simulation": root.tree.nbytes() / num_of_searches,
+        "dense_edge_bytes_per_simulation": num_of_nodes * DENSE_BYTES_PER_NODE / num_of_searches,
+    }
+
+
+if __name__ == "__main__":
+    for num_of_searches in [100, 400]:
+        result = measure(num_of_searches)
+        print(f"{result['simulations']} simulations, {result['nodes']} nodes, {result['edges']} edges")
+        print(f"    traced bytes per simulation: {result['bytes_per_simulation']:.0f}")
+        print(f"    edge store bytes per simulation: {result['edge_bytes_per_simulation']:.0f}")
+        print(
+            f"    dense 4672 arrays would need: {result['dense_edge_bytes_per_simulation']:.0f}")
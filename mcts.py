@@ -1,170 +1,444 @@
 import chess
+import chess.polyglot
 import numpy as np
 import math
 import collections
 import torch
 import random
 
-from representations.moves import decode_move, encode_actions
-from representations.board import encode_board, decode_board
-from settings import NUM_OF_MCTS_SEARCHES, EXPLORATION_RATE
-import mcts
+from representations.moves import decode_action, encode_action_indices
+from representations.board import encode_board, encode_next_board, decode_board
+from settings import NUM_OF_MCTS_SEARCHES, EXPLORATION_RATE, EXPLORATION_BASE, MCTS_BATCH_SIZE, VIRTUAL_LOSS, \
+    TREE_EDGE_CAPACITY, REUSE_MCTS_TREE, TRANSPOSITION_TABLE_SIZE_MB
+from transposition_table import TranspositionTable
+
+
+class Tree():
+    """
+    Flat storage for the edges of an MCTS tree.
+
+    Every expanded node owns a contiguous block of edges, one per legal move, so a node costs a few bytes per legal
+    move instead of three dense 4672 arrays. The arrays are preallocated and doubled whenever they run out of space.
+    """
+
+    def __init__(self, capacity=TREE_EDGE_CAPACITY):
+        self.size = 0
+        self.actions = np.zeros([capacity], dtype=np.int32)
+        self.priors = np.zeros([capacity], dtype=np.float32)
+        self.visits = np.zeros([capacity], dtype=np.float32)
+        self.total_value = np.zeros([capacity], dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    def allocate(self, actions):
+        """
+        Reserve one edge per action.
+        Inputs:
+            - actions: array of action indices
+        Outputs:
+            - index of the first edge reserved
+        """
+        start = self.size
+        end = start + len(actions)
+        if end > len(self.actions):
+            self._grow(end)
+        self.actions[start:end] = actions
+        self.size = end
+        return start
+
+    def _grow(self, min_capacity):
+        capacity = max(min_capacity, 2*len(self.actions))
+        for name in ["actions", "priors", "visits", "total_value"]:
+            old = getattr(self, name)
+            new = np.zeros([capacity], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def nbytes(self):
+        return self.actions.nbytes + self.priors.nbytes + self.visits.nbytes + self.total_value.nbytes
 
 
 class UCTNode():
     """
     A class to create an upper confidence node in MCTS
+
+    Edge statistics (priors, visits, total value) live in the Tree shared by all the nodes of a search.
+    The child_* properties return views of the node's block of edges, in the order of child_actions.
     """
+    __slots__ = ["s", "move", "parent", "tree", "edge", "edge_start", "num_edges", "children", "is_expanded",
+                 "_board", "_legal_actions", "_outcome", "_zobrist_history"]
 
-    def __init__(self, state, move, parent=None):
+    def __init__(self, state, move, parent=None, edge=None, tree=None, board=None):
         """
         Inputs: 
             - state: state of the game
             - move: encoded last move played. (ie (starting square, move type))
             - parent: parent node if it exists
+            - edge: index in the tree of the edge from parent to this node
+            - tree: Tree storing the edges. Defaults to the parent's tree, or a new one for a root
+            - board: chess.Board() of the state, with its move stack. Decoded from state when not given
         """
         self.s = state
         self.move = move
         self.parent = parent
+        if tree is None:
+            tree = parent.tree if isinstance(parent, UCTNode) else Tree()
+        self.tree = tree
+        self.edge = edge
+        self.edge_start = 0
+        self.num_edges = 0
         self.children = {}  # key = idx_of_action required to reach child node, value = child node
-        self.child_priors = np.zeros([4672]).astype(
-            float)  # store previous prediction of nnet
-        self.child_number_of_visits = np.zeros([4672]).astype(float)
-        self.child_total_value = np.zeros([4672]).astype(float)
+        self.is_expanded = False
+        self._board = board
+        self._legal_actions = None
+        self._outcome = None
+        self._zobrist_history = None
+
+    @property
+    def board(self):
+        # decoding loses the move stack so a live board should be passed in whenever one is available
+        if self._board is None:
+            self._board = decode_board(np.asarray(self.s))
+        return self._board
+
+    @property
+    def turn(self):
+        return self.board.turn
+
+    @property
+    def outcome(self):
+        # False marks a position which has been checked and is not over
+        if self._outcome is None:
+            self._outcome = self.board.outcome() or False
+        return self._outcome or None
+
+    @property
+    def zobrist_history(self):
+        """
+        Zobrist hashes of this position and of up to 7 earlier positions, most recent first.
+        """
+        if self._zobrist_history is None:
+            zobrist = chess.polyglot.zobrist_hash(self.board)
+            if isinstance(self.parent, UCTNode):
+                self._zobrist_history = (zobrist,) + \
+                    self.parent.zobrist_history[:7]
+            else:
+                board = self.board.copy()
+                history = [zobrist]
+                while board.move_stack and len(history) < 8:
+                    board.pop()
+                    history.append(chess.polyglot.zobrist_hash(board))
+                self._zobrist_history = tuple(history)
+        return self._zobrist_history
+
+    @property
+    def transposition_key(self):
+        """
+        Key of the position in a TranspositionTable. Together with the history, the repetition counts of each history
+        step, the move count and the no progress count make up all of the nnet input.
+        """
+        repetitions = tuple(float(r) for r in self.s[0, 0, 12:112:14])
+        return (self.zobrist_history, repetitions, self.board.ply(), self.board.halfmove_clock)
+
+    @property
+    def child_actions(self):
+        return self.tree.actions[self.edge_start:self.edge_start + self.num_edges]
+
+    @property
+    def child_priors(self):
+        # store previous prediction of nnet
+        return self.tree.priors[self.edge_start:self.edge_start + self.num_edges]
+
+    @child_priors.setter
+    def child_priors(self, value):
+        self.tree.priors[self.edge_start:self.edge_start +
+                         self.num_edges] = value
+
+    @property
+    def child_number_of_visits(self):
+        return self.tree.visits[self.edge_start:self.edge_start + self.num_edges]
+
+    @property
+    def child_total_value(self):
+        return self.tree.total_value[self.edge_start:self.edge_start + self.num_edges]
 
     @property
     def number_of_visits(self):
-        return self.parent.child_number_of_visits[self.move]
+        if isinstance(self.parent, DummyNode):
+            return self.parent.child_number_of_visits[self.move]
+        return self.tree.visits[self.edge]
 
     @number_of_visits.setter
     def number_of_visits(self, value):
-        self.parent.child_number_of_visits[self.move] = value
+        if isinstance(self.parent, DummyNode):
+            self.parent.child_number_of_visits[self.move] = value
+        else:
+            self.tree.visits[self.edge] = value
 
     @property
     def total_value(self):
-        return self.parent.child_total_value[self.move]
+        if isinstance(self.parent, DummyNode):
+            return self.parent.child_total_value[self.move]
+        return self.tree.total_value[self.edge]
 
     @total_value.setter
     def total_value(self, value):
-        self.parent.child_total_value[self.move] = value
+        if isinstance(self.parent, DummyNode):
+            self.parent.child_total_value[self.move] = value
+        else:
+            self.tree.total_value[self.edge] = value
 
     @property
     def legal_actions(self):
-        # store the legal actions of given state
-        board = decode_board(self.s.numpy())
-        legal_actions = encode_actions(board.legal_moves, board.turn)
-        return np.where(legal_actions == 1)[0]
+        # computed once per node since it's needed by both expand and the nnet policy masking
+        if self._legal_actions is None:
+            self._legal_actions = encode_action_indices(
+                self.board.legal_moves, self.board.turn)
+        return self._legal_actions
 
     def child_Q(self):
-        return self.child_total_value / (self.child_number_of_visits + 1)
+        # mean value of each edge, 0 for edges which haven't been visited yet
+        visits = self.child_number_of_visits
+        return np.divide(self.child_total_value, visits, out=np.zeros_like(visits), where=visits > 0)
 
     def child_U(self):
-        if type(self.parent) is mcts.DummyNode:
-            return np.zeros([4672]).astype(float)
-        else:
-            return math.sqrt(self.number_of_visits) * (
-                abs(self.child_priors) / (1 + self.child_number_of_visits))
+        """
+        Exploration term of the AlphaZero PUCT formula:
+            C(s) * P(s,a) * sqrt(N(s)) / (1 + N(s,a)) with C(s) = log((1 + N(s) + c_base) / c_base) + c_init
+        where c_init = EXPLORATION_RATE and c_base = EXPLORATION_BASE.
+        """
+        parent_visits = self.number_of_visits
+        c_puct = math.log((1 + parent_visits + EXPLORATION_BASE) /
+                          EXPLORATION_BASE) + EXPLORATION_RATE
+        return c_puct * math.sqrt(parent_visits) * self.child_priors / (1 + self.child_number_of_visits)
 
     def add_dirichlet_noise(self):
-        noise = np.random.default_rng().dirichlet(
-            np.zeros([len(self.legal_actions)], dtype=np.float32)+0.3)
-        for i, value in enumerate(self.legal_actions):
-            self.child_priors[value] = 0.75 * \
-                self.child_priors[value] + 0.25*noise[i]
+        # use the global generator so that seeding np.random makes self-play reproducible
+        noise = np.random.dirichlet(
+            np.zeros([self.num_edges], dtype=np.float32)+0.3)
+        self.child_priors = 0.75 * self.child_priors + 0.25*noise
 
     def best_child(self):
-        func_to_max = self.child_U() + self.child_Q()
-        max_value = -10000
-        max_idx = -1
-        eq_values = []
-        for idx in self.legal_actions:
-            if func_to_max[idx] > max_value:
-                max_idx = idx
-                max_value = func_to_max[idx]
-                eq_values = []
-            elif func_to_max[idx] == max_value:
-                eq_values.append(idx)
-        if eq_values != []:
-            eq_values.append(max_idx)
-            max_idx = random.choice(eq_values)
-        return max_idx
+        """
+        Outputs:
+            - position of the edge in child_actions maximising Q + U. Ties are broken at random
+        """
+        func_to_max = self.child_Q() + self.child_U()
+        best = np.flatnonzero(func_to_max == func_to_max.max())
+        if len(best) == 1:
+            return best[0]
+        return random.choice(best)
 
     def check_if_child_node_exists(self, action_idx):
         return action_idx in self.children.keys()
 
-    def search(self, nnet):
+    @property
+    def is_terminal(self):
+        return self.outcome is not None
+
+    def terminal_value(self):
+        """
+        Value of a finished game from the perspective of the player to move.
         """
-        Method to perform MCTS search on a given node. 
+        if self.outcome.winner is None:
+            return 0
+        return 1 if self.outcome.winner == self.turn else -1
+
+    def add_virtual_loss(self, edge):
+        self.tree.visits[edge] += VIRTUAL_LOSS
+        self.tree.total_value[edge] -= VIRTUAL_LOSS
+
+    def revert_virtual_loss(self):
+        """
+        Undo the virtual loss applied on the path from the root to this node without recording a visit.
+        Used when a selection collides with a leaf that is already waiting to be evaluated.
+        """
+        current = self
+        while isinstance(current.parent, UCTNode):
+            self.tree.visits[current.edge] -= VIRTUAL_LOSS
+            self.tree.total_value[current.edge] += VIRTUAL_LOSS
+            current = current.parent
+
+    def select_leaf(self):
+        """
+        Walk down the tree from this node, following best_child, until reaching a node that is terminal or has not
+        been evaluated by the nnet yet. A virtual loss is added to every edge on the way so that the other selections
+        of the same batch are steered towards different leaves.
+        Outputs:
+            - leaf: the UCTNode reached
+        """
+        current = self
+        while current.is_expanded and not current.is_terminal:
+            edge = current.edge_start + current.best_child()
+            best_action = int(current.tree.actions[edge])
+            current.add_virtual_loss(edge)
+            if not current.check_if_child_node_exists(best_action):
+                board = current.board.copy()
+                board.push(get_move(board, best_action))
+                next_s = torch.from_numpy(
+                    encode_next_board(np.asarray(current.s), board)).float()
+                current.children[best_action] = UCTNode(
+                    next_s, best_action, current, edge, board=board)
+            current = current.children[best_action]
+        return current
+
+    def expand(self, p_s):
+        """
+        Assign the nnet policy to the child priors. Illegal moves are removed and the remaining logits are normalised
+        with a softmax.
+        Inputs:
+            - p_s: 4672 array of policy logits predicted by the nnet for this node
+        """
+        self.expand_from_priors(self.masked_priors(p_s))
+
+    def masked_priors(self, p_s):
+        """
+        Outputs:
+            - softmax of the nnet policy logits p_s over the legal moves, in the order of legal_actions
+        """
+        logits = p_s[self.legal_actions] - p_s[self.legal_actions].max()
+        priors = np.exp(logits).astype(np.float32)
+        return priors / priors.sum()
+
+    def expand_from_priors(self, priors):
+        """
+        Create the edges of this node.
+        Inputs:
+            - priors: prior of each legal move, in the order of legal_actions
+        """
+        legal_actions = self.legal_actions
+        self.edge_start = self.tree.allocate(legal_actions)
+        self.num_edges = len(legal_actions)
+        self.child_priors = priors
+        # add dirichlet noise to root node
+        if isinstance(self.parent, DummyNode):
+            self.add_dirichlet_noise()
+        self.is_expanded = True
+
+    def search(self, nnet, batch_size=1, transposition_table=None):
+        """
+        Method to perform one round of MCTS search from a given node.
+        Up to batch_size leaves are selected using virtual loss, evaluated with a single nnet call and backed up.
         Inputs:
             -nnet: neural net used to evaluate position
+            -batch_size: maximum number of leaves to evaluate in this round
+            -transposition_table: TranspositionTable to look evaluations up in before calling the nnet, and to store
+            new evaluations in
         Outputs:
-            - total_value: value determined by MCTS algo
-        Note we return the negative value becaue we expect the next search to be from perspective of other player.
-        """
-        # check if game has ended
-        board = decode_board(self.s.numpy())
-        outcome = board.outcome()
-        if outcome:
-            if outcome.winner == board.turn:
-                self.total_value = 1
-            elif outcome.winner is None:
-                self.total_value = 0
+            - number of simulations completed. This can be less than batch_size if a selection reaches a leaf
+            which is already waiting to be evaluated.
+        """
+        leaves = []
+        completed = 0
+        for i in range(batch_size):
+            leaf = self.select_leaf()
+            if leaf.is_terminal:
+                leaf.backpropogate(leaf.terminal_value())
+                completed += 1
+            elif any(leaf is pending for pending in leaves):
+                leaf.revert_virtual_loss()
+                break
             else:
-                self.total_value = -1
-            return -self.total_value
-
-        # find action a which maximises U
-        best_action = self.best_child()
-
-        # check if child exists
-        if not self.check_if_child_node_exists(best_action):
-            next_s = get_next_state(self.s, best_action)
-            # create child
-            child = UCTNode(next_s, best_action, self)
-            # predict
-            p_s, self.child_total_value[best_action] = nnet(next_s)
-            # assign p_s to child priors removing any values for illegal moves
-            p_s = p_s.detach().cpu().numpy().reshape(-1)
-            for idx in range(len(p_s)):
-                if idx not in child.legal_actions:
-                    p_s[idx] = 0.0
-            child.child_priors = p_s
-            # add dirichlet noise to root node
-            if child.parent.parent == None:
-                child.add_dirichlet_noise()
-            # assign to child
-            self.children[best_action] = child
-            self.child_number_of_visits[best_action] += 1
-            return -self.child_total_value[best_action]
-        else:
-            self.child_number_of_visits[best_action] += 1
-            return self.children[best_action].search(nnet)
+                entry = None
+                if transposition_table is not None:
+                    entry = transposition_table.get(leaf.transposition_key)
+                if entry is None:
+                    leaves.append(leaf)
+                else:
+                    priors, value = entry
+                    leaf.expand_from_priors(priors)
+                    leaf.backpropogate(value)
+                    completed += 1
+        if leaves:
+            evaluate_leaves(leaves, nnet, transposition_table)
+        return completed + len(leaves)
+
+    def make_root(self):
+        """
+        Detach this node from its parent so that the next search can start from it, keeping the statistics of its
+        subtree. The subtree is copied to a new Tree so the edges of the rest of the old tree can be freed, and
+        dirichlet noise is added to the priors since this is now the root.
+        """
+        visits, total_value = self.number_of_visits, self.total_value
+        self.parent = DummyNode()
+        self.edge = None
+        self.number_of_visits, self.total_value = visits, total_value
+
+        old_tree, tree = self.tree, Tree()
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            old_start, end = node.edge_start, node.edge_start + node.num_edges
+            node.edge_start = tree.allocate(old_tree.actions[old_start:end])
+            new_edges = slice(node.edge_start, node.edge_start + node.num_edges)
+            tree.priors[new_edges] = old_tree.priors[old_start:end]
+            tree.visits[new_edges] = old_tree.visits[old_start:end]
+            tree.total_value[new_edges] = old_tree.total_value[old_start:end]
+            node.tree = tree
+            for child in node.children.values():
+                child.edge += node.edge_start - old_start
+                nodes.append(child)
+
+        if self.is_expanded:
+            self.add_dirichlet_noise()
 
     def backpropogate(self, value):
+        """
+        Back up the evaluation of this node to the root and remove the virtual loss added in select_leaf.
+        Inputs:
+            - value: evaluation of this node from the perspective of the player to move
+        Note the value is negated at every step since each edge stores the value from the perspective of the player
+        choosing it.
+        """
         current = self
-        # use this to track the colour of the player's value being updated.
-        counter = True
-        while current.parent is not None:
-            current.child_number_of_visits[self.move] += 1
-            if counter:
-                current.total_value += 1*value
-            else:
-                current.total_value += -1*value
+        while isinstance(current.parent, UCTNode):
+            value = -value
+            self.tree.visits[current.edge] += 1 - VIRTUAL_LOSS
+            self.tree.total_value[current.edge] += value + VIRTUAL_LOSS
             current = current.parent
-            counter = not counter
+        if isinstance(current.parent, DummyNode):
+            current.number_of_visits += 1
+
+
+def evaluate_leaves(leaves, nnet, transposition_table=None):
+    """
+    Evaluate a batch of leaves with a single nnet call, then expand and back up each of them.
+    Inputs:
+        - leaves: list of UCTNode selected by select_leaf
+        - nnet: neural net used to evaluate the positions
+        - transposition_table: TranspositionTable to store the evaluations in
+    """
+    states = torch.stack([torch.as_tensor(leaf.s).float() for leaf in leaves])
+    with torch.no_grad():
+        p, v = nnet(states)
+    p = p.detach().cpu().numpy().reshape(len(leaves), -1)
+    v = v.detach().cpu().numpy().reshape(-1)
+    for leaf, p_s, v_s in zip(leaves, p, v):
+        priors = leaf.masked_priors(p_s)
+        if transposition_table is not None:
+            transposition_table.put(leaf.transposition_key, priors, float(v_s))
+        leaf.expand_from_priors(priors)
+        leaf.backpropogate(float(v_s))
+
+
+def get_move(board, action_idx):
+    """
+    Decode an action index into a chess.Move() for the player to move on board.
+    Pawn moves to the last rank without an underpromotion are promotions to a queen.
+    """
+    move = decode_action(action_idx, board.turn)
+    if board.piece_type_at(move.from_square) == chess.PAWN and chess.square_rank(move.to_square) in [0, 7] and move.promotion == None:
+        move.promotion = chess.QUEEN
+    return move
 
 
 def get_next_state(s, action_idx):
-    i, j, k = np.unravel_index(action_idx, [8, 8, 73])
-    board = decode_board(s.numpy())
-    move = decode_move(
-        i, j, k, board.turn)
+    board = decode_board(np.asarray(s))
     # make move
-    if board.piece_at(move.from_square) == 1 and (board.turn, chess.square_rank(move.from_square)) in [(True, 6), (False, 1)] and move.promotion == None:
-        move.promotion = chess.QUEEN
-    board.push(move)
-    # encode next board
-    next_state = encode_board(board)
+    board.push(get_move(board, action_idx))
+    # encode next board, keeping the history of s
+    next_state = encode_next_board(np.asarray(s), board)
     return torch.from_numpy(next_state)
 
 
@@ -179,27 +453,38 @@ class DummyNode():
         self.child_number_of_visits = collections.defaultdict(float)
 
 
-def complete_one_mcts(num_of_searches, nnet, starting_position=chess.Board()):
-    root = UCTNode(torch.from_numpy(encode_board(starting_position)).float(),
-                   move=None, parent=DummyNode())
-    for i in range(num_of_searches):
-        value = root.search(nnet)
-        root.backpropogate(value)
-    return np.argmax(root.child_number_of_visits), root
+def complete_one_mcts(num_of_searches, nnet, starting_position=chess.Board(), batch_size=MCTS_BATCH_SIZE, root=None,
+                      transposition_table=None):
+    """
+    Run num_of_searches simulations from starting_position.
+    Leaves are evaluated batch_size at a time, using virtual loss to spread the selections of a batch over the tree.
+    If root is given (see UCTNode.make_root) the search continues from it instead, and the simulations it has already
+    been through count towards num_of_searches.
+    Evaluations are looked up in and added to transposition_table if one is given.
+    """
+    if root is None:
+        root = UCTNode(torch.from_numpy(encode_board(starting_position)).float(),
+                       move=None, parent=DummyNode(), board=starting_position.copy())
+    completed = int(root.number_of_visits)
+    while completed < num_of_searches:
+        completed += root.search(nnet, min(batch_size, num_of_searches - completed),
+                                 transposition_table)
+    return int(root.child_actions[np.argmax(root.child_number_of_visits)]), root
 
 
 def get_policy(node):
     """
     Function to get policy of a node. Should really only be called on root of searches
     """
-    policy = np.zeros(8*8*73).astype(int)
-    for idx in np.where(node.child_number_of_visits != 0)[0]:
-        policy[idx] = node.child_number_of_visits[idx] / \
-            node.child_number_of_visits.sum()
+    policy = np.zeros(8*8*73, dtype=np.float32)
+    visits = node.child_number_of_visits
+    if visits.sum() > 0:
+        policy[node.child_actions] = visits / visits.sum()
     return policy
 
 
-def self_play_one_game(nnet, num_of_search_iters=NUM_OF_MCTS_SEARCHES, starting_position=chess.Board()):
+def self_play_one_game(nnet, num_of_search_iters=NUM_OF_MCTS_SEARCHES, starting_position=chess.Board(), verbose=True,
+                       reuse_tree=REUSE_MCTS_TREE, transposition_table=None):
     """
     A function to play 1 training game.
 
@@ -207,6 +492,10 @@ def self_play_one_game(nnet, num_of_search_iters=NUM_OF_MCTS_SEARCHES, starting_
         - num_of_search_iters: this is used to know how many iterations the MCTS algo should perform before picking the best move
         - nnet: neural net used to evaluate a position
         - starting_position: the starting position of the training games
+        - verbose: print the board after every move and the result
+        - reuse_tree: start each search from the subtree of the move played rather than from scratch
+        - transposition_table: TranspositionTable shared by the searches. A new one is used for the game if None
+        and TRANSPOSITION_TABLE_SIZE_MB is not 0.
 
     Outputs: 
         - a list where each entry is [s,p,v] for each of the states, policy and values encountered in the training game. 
@@ -216,32 +505,35 @@ def self_play_one_game(nnet, num_of_search_iters=NUM_OF_MCTS_SEARCHES, starting_
     dataset = []  # to add [s,p] encountered
     dataset_v = []  # to add [s,p,v] once game is over
     board = starting_position.copy()
+    root = None
+    if transposition_table is None and TRANSPOSITION_TABLE_SIZE_MB:
+        transposition_table = TranspositionTable()
     while not board.outcome():
-        print(board)
-        print("\n")
-        best_move, root = complete_one_mcts(num_of_search_iters, nnet, board)
-        bm_start_file, bm_start_rank, bm_move_type = np.unravel_index(best_move, [
-                                                                      8, 8, 73])
+        if verbose:
+            print(board)
+            print("\n")
+        best_move, root = complete_one_mcts(
+            num_of_search_iters, nnet, board, root=root, transposition_table=transposition_table)
         policy = get_policy(root)
         dataset.append([root.s, policy])
-        move = decode_move(bm_start_file,
-                           bm_start_rank, bm_move_type, board.turn)
-        if board.piece_at(move.from_square) == 1 and (board.turn, chess.square_rank(move.from_square)) in [(True, 6), (False, 1)] and move.promotion == None:
-            move.promotion = chess.QUEEN
-        board.push(decode_move(bm_start_file,
-                   bm_start_rank, bm_move_type, board.turn))
-    print(board)
+        board.push(get_move(board, best_move))
+        root = root.children.get(best_move) if reuse_tree else None
+        if root is not None:
+            root.make_root()
     if board.outcome().winner == True:  # white win
         v = 1
-        print("White win")
+        result = "White win"
     elif board.outcome().winner == False:
         v = -1
-        print("Black win")
+        result = "Black win"
     else:
         v = 0
-        print("Draw")
+        result = "Draw"
     for idx, data in enumerate(dataset):
         s, p = data
         dataset_v.append([s, p, v])
-    print(f"Game complete")
+    if verbose:
+        print(board)
+        print(result)
+        print(f"Game complete")
     return dataset_v
@@ -1,8 +1,11 @@
 # net used to train model. As a general rule, the default settings for convolution layers, residual layers have been used.
+import copy
+import torch
 from torch import nn, tanh
 import torch.nn.functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 
-from settings import NUMBER_OF_RES_LAYERS
+from settings import NUMBER_OF_RES_LAYERS, INFERENCE_BFLOAT16
 
 
 class ConvBlock(nn.Module):
@@ -120,3 +123,91 @@ class ChessNet(nn.Module):
             out = getattr(self, f"res_{i+1}")(out)
         out = self.head(out)
         return out
+
+    def to_inference(self, bfloat16=INFERENCE_BFLOAT16, check=True):
+        """
+        Returns a frozen InferenceChessNet with the weights of this net, for evaluating positions in self-play.
+
+        Inputs:
+            - bfloat16: run convolutions and linear layers in bfloat16 autocast
+            - check: raise a ValueError if the outputs of the InferenceChessNet on a random batch are not within
+            tolerance of this net's eval mode outputs
+        """
+        was_training = self.training
+        self.eval()
+        inference_net = InferenceChessNet(self, bfloat16)
+        if check:
+            check_inference_net(self, inference_net)
+        self.train(was_training)
+        return inference_net
+
+
+class InferenceChessNet(nn.Module):
+    """
+    ChessNet for evaluation only. BatchNorm layers are folded into the convolutions before them, activations use the
+    channels_last memory format and forward runs in torch.inference_mode. Use ChessNet.to_inference() to create one.
+    """
+
+    def __init__(self, nnet, bfloat16=False):
+        super(InferenceChessNet, self).__init__()
+        self.bfloat16 = bfloat16
+        self.conv = fuse_conv_bn_eval(nnet.conv.conv1, nnet.conv.bn1)
+        self.res = nn.ModuleList()
+        for i in range(NUMBER_OF_RES_LAYERS):
+            block = getattr(nnet, f"res_{i+1}")
+            self.res.append(nn.ModuleList([fuse_conv_bn_eval(block.conv1, block.bn1),
+                                           fuse_conv_bn_eval(block.conv2, block.bn2)]))
+        head = nnet.head
+        self.conv_v = fuse_conv_bn_eval(head.conv1_v, head.bn1_v)
+        # copies so that freezing this net doesn't freeze the net being trained
+        self.fc1_v = copy.deepcopy(head.fc1_v)
+        self.fc2_v = copy.deepcopy(head.fc2_v)
+        self.conv_p = fuse_conv_bn_eval(head.conv1_p, head.bn1_p)
+        self.fc1_p = copy.deepcopy(head.fc1_p)
+        self.to(memory_format=torch.channels_last)
+        self.eval()
+        self.requires_grad_(False)
+
+    def forward(self, s):
+        """
+        Same inputs and float32 outputs as ChessNet.forward.
+        """
+        device = self.conv.weight.device
+        with torch.inference_mode(), torch.autocast(device.type, dtype=torch.bfloat16, enabled=self.bfloat16):
+            # same reinterpretation of the board as ConvBlock
+            s = s.float().reshape(-1, 119, 8, 8).contiguous(
+                memory_format=torch.channels_last)
+            out = F.relu(self.conv(s))
+            for conv1, conv2 in self.res:
+                out = F.relu(conv2(F.relu(conv1(out))) + out)
+
+            out_v = F.relu(self.conv_v(out)).reshape(-1, 8*8)
+            out_v = tanh(self.fc2_v(F.relu(self.fc1_v(out_v))))
+            out_p = F.relu(self.conv_p(out)).reshape(-1, 8*8*128)
+            out_p = self.fc1_p(out_p)
+        return out_p.float(), out_v.float()
+
+
+def check_inference_net(nnet, inference_net, s=None, tolerance=None):
+    """
+    A function to check that an InferenceChessNet gives the same outputs as the eval mode ChessNet it was made from.
+    Raises a ValueError if the difference in policy or value goes over tolerance times the largest output.
+
+    Inputs:
+        - s: batch of states to compare on. A random batch if None.
+        - tolerance: relative tolerance, by default 1e-4 in float32 and 5e-2 in bfloat16
+    """
+    if s is None:
+        s = (torch.rand([16, 8, 8, 119]) < 0.2).float()
+    if tolerance is None:
+        tolerance = 5e-2 if inference_net.bfloat16 else 1e-4
+    s = s.to(inference_net.conv.weight.device)
+    with torch.no_grad():
+        p, v = nnet(s)
+    p_inference, v_inference = inference_net(s)
+    for name, expected, actual in [("policy", p, p_inference), ("value", v, v_inference)]:
+        error = (expected - actual).abs().max().item()
+        scale = max(expected.abs().max().item(), 1.0)
+        if error > tolerance * scale:
+            raise ValueError(
+                f"InferenceChessNet {name} differs from ChessNet by {error}, over the tolerance of {tolerance * scale}")
@@ -1,21 +1,53 @@
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, BatchSampler, RandomSampler
 import numpy as np
+import torch
+
+from nnet.replay_buffer import ReplayWindow
 
 
 class BoardData(Dataset):
     def __init__(self, dataset):
-        # dataset is a list of lists of form [s, p, v].
+        # dataset is a list of lists of form [s, p, v], or a ReplayWindow which is read from disk as it is indexed.
+        # lists are stacked into contiguous float32 tensors so that a batch is a single slice.
         super().__init__()
-        self.X = []
-        self.Y_p, self.Y_v = [], []
-        for data in dataset:
-            s, p, v = data
-            self.X.append(s)
-            self.Y_p.append(p)
-            self.Y_v.append(v)
+        self.window = None
+        if isinstance(dataset, ReplayWindow):
+            self.window = dataset
+            return
+        self.X = torch.stack([torch.as_tensor(s, dtype=torch.float32).reshape(8, 8, 119) for s, p, v in dataset]) \
+            if dataset else torch.zeros([0, 8, 8, 119])
+        self.Y_p = torch.from_numpy(np.array([np.asarray(p, dtype=np.float32) for s, p, v in dataset],
+                                             dtype=np.float32).reshape(-1, 8*8*73))
+        self.Y_v = torch.tensor([float(v) for s, p, v in dataset])
+
+    def get_batch(self, indices):
+        """
+        Outputs:
+            - s, p, v float32 tensors of the samples at indices, in order
+        """
+        if self.window is not None:
+            return self.window.get_batch(indices)
+        indices = torch.as_tensor(indices)
+        return self.X[indices], self.Y_p[indices], self.Y_v[indices]
 
     def __getitem__(self, idx):
+        # a list of indices, as given by batch_loader_sampler(), returns the whole batch at once
+        if isinstance(idx, (list, np.ndarray, torch.Tensor)):
+            return self.get_batch(idx)
+        if self.window is not None:
+            return self.window[idx]
         return self.X[idx], self.Y_p[idx], self.Y_v[idx]
 
     def __len__(self):
+        if self.window is not None:
+            return len(self.window)
         return len(self.X)
+
+
+def batch_loader_sampler(dataset, batch_size, shuffle=True):
+    """
+    Sampler giving a DataLoader with batch_size=None lists of indices, so that BoardData slices each batch in one go
+    rather than collating batch_size separate samples.
+    """
+    sampler = RandomSampler(dataset) if shuffle else range(len(dataset))
+    return BatchSampler(sampler, batch_size, drop_last=False)
@@ -0,0 +1,33 @@
+# export of ChessNet as a standalone TorchScript model for self-play
+import torch
+
+from settings import INFERENCE_BFLOAT16
+
+
+def export_inference_net(nnet, path, bfloat16=INFERENCE_BFLOAT16):
+    """
+    A function to save the inference version of nnet as a traced and frozen TorchScript model. Loading it needs neither
+    ChessNet nor its weight initialisation, and calling it skips the Python module dispatch.
+
+    Inputs:
+        - nnet: ChessNet to export
+        - path: file to save the model to
+        - bfloat16: see ChessNet.to_inference()
+    Outputs:
+        - path
+    """
+    inference_net = nnet.to_inference(bfloat16=bfloat16)
+    example = torch.zeros([1, 8, 8, 119],
+                          device=next(inference_net.parameters()).device)
+    traced = torch.jit.freeze(torch.jit.trace(
+        inference_net, example, check_trace=False))
+    torch.jit.save(traced, path)
+    return path
+
+
+def load_inference_net(path, map_location=None):
+    """
+    Outputs:
+        - model saved by export_inference_net(), with the same inputs/outputs as ChessNet
+    """
+    return torch.jit.load(path, map_location=map_location)
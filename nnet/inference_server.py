@@ -0,0 +1,151 @@
+# inference service sharing one ChessNet between many concurrent searches
+import queue
+import threading
+import time
+import torch
+import torch.multiprocessing as mp
+
+from settings import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT, MCTS_BATCH_SIZE
+
+
+class InferenceClient():
+    """
+    Callable with the same inputs/outputs as ChessNet which sends positions to an InferenceServer and waits for the
+    result. Clients can be passed to other processes, each client must only be used by one search at a time.
+    """
+
+    def __init__(self, client_id, states, policies, values, requests, ready):
+        self.client_id = client_id
+        self.states = states
+        self.policies = policies
+        self.values = values
+        self.requests = requests
+        self.ready = ready
+
+    def __call__(self, s):
+        """
+        Inputs:
+            - s: batch_size x 8 x 8 x 119 tensor
+        Outputs:
+            - policy: batch size x (73*8*8) tensor
+            - value: batch size x 1 tensor
+        """
+        s = s.reshape(-1, 8, 8, 119)
+        slot_size = self.states.size(1)
+        p, v = [], []
+        for start in range(0, len(s), slot_size):
+            chunk = s[start:start + slot_size]
+            self.states[self.client_id, :len(chunk)] = chunk
+            self.requests.put((self.client_id, len(chunk)))
+            self.ready.acquire()
+            p.append(self.policies[self.client_id, :len(chunk)].clone())
+            v.append(self.values[self.client_id, :len(chunk)].clone())
+        return torch.cat(p), torch.cat(v)
+
+
+class InferenceServer():
+    """
+    Owns the ChessNet used by many concurrent MCTS searches and evaluates their positions in dynamic batches.
+
+    Each client has a slot of shared memory for its positions and results. A client writes its positions to its slot
+    and puts (client_id, number of positions) on the request queue. The server waits for a first request, then keeps
+    collecting requests until it has max_batch_size positions or max_wait seconds have passed, runs one forward pass
+    over all of them and wakes the clients up once their results are written.
+    """
+
+    def __init__(self, nnet, num_of_clients, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait=INFERENCE_MAX_WAIT,
+                 client_batch_size=MCTS_BATCH_SIZE, ctx=None):
+        """
+        Inputs:
+            - nnet: neural net used to evaluate positions
+            - num_of_clients: number of clients to create
+            - max_batch_size: the server stops waiting for more requests once a batch has this many positions. A batch
+            can go over by at most one request.
+            - max_wait: maximum number of seconds to wait for more requests after the first one of a batch
+            - client_batch_size: maximum number of positions a client sends in one request. Bigger calls are split.
+            - ctx: multiprocessing context the clients will be used in
+        """
+        ctx = ctx or mp.get_context("spawn")
+        self.nnet = nnet
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.states = torch.zeros(
+            [num_of_clients, client_batch_size, 8, 8, 119]).share_memory_()
+        self.policies = torch.zeros(
+            [num_of_clients, client_batch_size, 8*8*73]).share_memory_()
+        self.values = torch.zeros(
+            [num_of_clients, client_batch_size, 1]).share_memory_()
+        self.requests = ctx.Queue()
+        self.ready = [ctx.Semaphore(0) for i in range(num_of_clients)]
+        self.clients = [InferenceClient(i, self.states, self.policies, self.values, self.requests, self.ready[i])
+                        for i in range(num_of_clients)]
+        self.num_of_batches = 0
+        self.num_of_positions = 0
+        self.thread = None
+
+    def start(self):
+        self.nnet.eval()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def mean_batch_size(self):
+        return self.num_of_positions / max(self.num_of_batches, 1)
+
+    def next_batch(self):
+        """
+        Outputs:
+            - list of (client_id, number of positions) to evaluate together, or None once the server is stopped
+        """
+        request = self.requests.get()
+        if request is None:
+            return None
+        batch = [request]
+        size = request[1]
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # finish this batch then stop
+                self.requests.put(None)
+                break
+            batch.append(request)
+            size += request[1]
+        return batch
+
+    def serve(self):
+        device = next(self.nnet.parameters()).device
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+            states = torch.cat([self.states[client_id, :n]
+                               for client_id, n in batch])
+            with torch.no_grad():
+                p, v = self.nnet(states.to(device))
+            p, v = p.cpu(), v.cpu().view(-1, 1)
+            start = 0
+            for client_id, n in batch:
+                self.policies[client_id, :n] = p[start:start + n]
+                self.values[client_id, :n] = v[start:start + n]
+                start += n
+                self.ready[client_id].release()
+            self.num_of_batches += 1
+            self.num_of_positions += start
@@ -0,0 +1,233 @@
+# on-disk replay buffer of self-play samples
+import os
+import shutil
+import numpy as np
+import torch
+
+from representations.sample import encode_samples, decode_samples
+from settings import REPLAY_BUFFER_PATH, REPLAY_SHARD_SIZE, REPLAY_WINDOW_GAMES
+
+# arrays with one entry per sample. The policy of sample i is entries policy_offsets[i]:policy_offsets[i+1] of the
+# policy arrays, see representations.sample.encode_samples()
+SAMPLE_FIELDS = ["samples", "games", "policy_offsets"]
+POLICY_FIELDS = ["policy_indices", "policy_visits"]
+
+
+def encode_game(data, game_id):
+    """
+    A function to encode the [s, p, v] samples of a game into the arrays stored in a shard.
+    """
+    samples, policy_offsets, policy_indices, policy_visits = encode_samples(
+        [np.asarray(s) for s, p, v in data], [np.asarray(p) for s, p, v in data], [v for s, p, v in data])
+    return {
+        "samples": samples,
+        "games": np.full([len(samples)], game_id, dtype=np.int64),
+        "policy_offsets": policy_offsets,
+        "policy_indices": policy_indices,
+        "policy_visits": policy_visits,
+    }
+
+
+def concatenate_samples(parts):
+    """
+    A function to join dicts of encoded samples, fixing up the policy offsets.
+    """
+    joined = {name: np.concatenate([part[name] for part in parts])
+              for name in SAMPLE_FIELDS[:-1] + POLICY_FIELDS}
+    offsets, start = [np.zeros([1], dtype=np.int64)], 0
+    for part in parts:
+        offsets.append(part["policy_offsets"][1:] + start)
+        start += part["policy_offsets"][-1]
+    joined["policy_offsets"] = np.concatenate(offsets)
+    return joined
+
+
+def read_samples(fields, rows):
+    """
+    A function to decode the samples at rows of a shard.
+
+    Outputs:
+        - s, p, v float32 tensors, see representations.sample.decode_samples()
+    """
+    return decode_samples(fields["samples"], fields["policy_offsets"], fields["policy_indices"], fields["policy_visits"],
+                          rows)
+
+
+class Shard():
+    """
+    A directory of .npy files, one per field, holding up to REPLAY_SHARD_SIZE samples. Fields are memory mapped when
+    first read so only the rows used are loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fields = None
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self._fields = {name: np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+                            for name in SAMPLE_FIELDS + POLICY_FIELDS}
+        return self._fields
+
+    def __len__(self):
+        return len(self.fields["samples"])
+
+    def __getstate__(self):
+        # reopen the memory maps rather than copying their contents when sent to a data loader worker
+        return {"path": self.path, "_fields": None}
+
+    def load(self):
+        return {name: np.array(field) for name, field in self.fields.items()}
+
+    @staticmethod
+    def write(path, fields):
+        """
+        Write the fields to a shard at path. The files are written to a temporary directory which is then renamed
+        so a crash never leaves a half written shard behind.
+        """
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        for name in SAMPLE_FIELDS + POLICY_FIELDS:
+            np.save(os.path.join(tmp_path, name + ".npy"), fields[name])
+        if os.path.exists(path):
+            old_path = path + ".old"
+            os.rename(path, old_path)
+            os.rename(tmp_path, path)
+            shutil.rmtree(old_path)
+        else:
+            os.rename(tmp_path, path)
+        return Shard(path)
+
+
+class ReplayBuffer():
+    """
+    Self-play samples stored on disk in shards of shard_size samples. Games are numbered in the order they are added
+    and the buffer carries on from the shards already in path when it is created.
+    """
+
+    def __init__(self, path=REPLAY_BUFFER_PATH, shard_size=REPLAY_SHARD_SIZE):
+        self.path = path
+        self.shard_size = shard_size
+        os.makedirs(path, exist_ok=True)
+        names = sorted(name for name in os.listdir(path) if name.startswith(
+            "shard_") and "." not in name)
+        self.shards = [Shard(os.path.join(path, name)) for name in names]
+        self.pending = []
+        self.num_of_pending_samples = 0
+        self.next_game_id = 0
+        if self.shards:
+            self.next_game_id = int(self.shards[-1].fields["games"][-1]) + 1
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards) + self.num_of_pending_samples
+
+    def add_game(self, data):
+        """
+        Inputs:
+            - data: list of [s, p, v] of one game as returned by self_play_one_game
+        Outputs:
+            - id given to the game
+        """
+        game_id = self.next_game_id
+        self.next_game_id += 1
+        if data:
+            self.pending.append(encode_game(data, game_id))
+            self.num_of_pending_samples += len(data)
+        if self.num_of_pending_samples >= self.shard_size:
+            self.flush()
+        return game_id
+
+    def flush(self):
+        """
+        Write the pending samples to disk. A partly filled last shard is topped up first, and full shards are split off.
+        """
+        if not self.pending:
+            return
+        parts = self.pending
+        if self.shards and len(self.shards[-1]) < self.shard_size:
+            parts = [self.shards.pop().load()] + parts
+        samples = concatenate_samples(parts)
+        for start in range(0, len(samples["samples"]), self.shard_size):
+            rows = np.arange(start, min(
+                start + self.shard_size, len(samples["samples"])))
+            path = os.path.join(self.path, f"shard_{len(self.shards):06d}")
+            self.shards.append(Shard.write(path, select_samples(samples, rows)))
+        self.pending = []
+        self.num_of_pending_samples = 0
+
+    def window(self, num_of_games=REPLAY_WINDOW_GAMES):
+        """
+        Outputs:
+            - ReplayWindow over the samples of the num_of_games most recent games written to disk
+        """
+        self.flush()
+        return ReplayWindow(self.shards, self.next_game_id - num_of_games)
+
+
+def select_samples(samples, rows):
+    """
+    A function to select rows of a dict of encoded samples. rows must be contiguous.
+    """
+    selected = {name: samples[name][rows] for name in SAMPLE_FIELDS[:-1]}
+    offsets = samples["policy_offsets"][rows[0]:rows[-1] + 2]
+    selected["policy_offsets"] = offsets - offsets[0]
+    for name in POLICY_FIELDS:
+        selected[name] = samples[name][offsets[0]:offsets[-1]]
+    return selected
+
+
+class ReplayWindow():
+    """
+    Read-only view of the samples of the games with id >= first_game. Indexing returns (s, p, v) like BoardData.
+    """
+
+    def __init__(self, shards, first_game):
+        self.shards, self.starts = [], []
+        for shard in shards:
+            games = shard.fields["games"]
+            if len(games) and games[-1] >= first_game:
+                self.shards.append(shard)
+                self.starts.append(
+                    int(np.searchsorted(games, first_game)))
+        self.offsets = np.cumsum(
+            [0] + [len(shard) - start for shard, start in zip(self.shards, self.starts)])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def locate(self, idx):
+        """
+        Outputs:
+            - (shard number, row in the shard) of sample idx of the window
+        """
+        shard = int(np.searchsorted(self.offsets, idx, side="right")) - 1
+        return shard, self.starts[shard] + idx - int(self.offsets[shard])
+
+    def get_batch(self, indices):
+        """
+        Outputs:
+            - s, p, v tensors of the samples at indices, in order
+        """
+        indices = np.asarray(indices)
+        shards = np.searchsorted(self.offsets, indices, side="right") - 1
+        s, p, v = [], [], []
+        order = []
+        for shard in np.unique(shards):
+            positions = np.flatnonzero(shards == shard)
+            rows = self.starts[shard] + indices[positions] - \
+                self.offsets[shard]
+            batch = read_samples(self.shards[shard].fields, rows)
+            s.append(batch[0])
+            p.append(batch[1])
+            v.append(batch[2])
+            order.append(positions)
+        inverse = np.argsort(np.concatenate(order))
+        return torch.cat(s)[inverse], torch.cat(p)[inverse], torch.cat(v)[inverse]
+
+    def __getitem__(self, idx):
+        shard, row = self.locate(idx)
+        s, p, v = read_samples(self.shards[shard].fields, [row])
+        return s[0], p[0], v[0]
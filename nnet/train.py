@@ -2,52 +2,60 @@ import torch
 import matplotlib.pyplot as plt
 import datetime
 import os
+import time
 from torch.utils.data import DataLoader
 
 from nnet.loss import AlphaLoss
-from nnet.dataset import BoardData
-from settings import BATCH_SIZE
+from nnet.dataset import BoardData, batch_loader_sampler
+from settings import BATCH_SIZE, TRAINING_DATA_WORKERS
 
 
-def train(nnet, lr, dataset, epoch_start=0, epoch_end=20):
+def train(nnet, lr, dataset, epoch_start=0, epoch_end=20, num_of_data_workers=TRAINING_DATA_WORKERS):
     """
     Inputs:
         - nnet: neural net to train
         - lr: learning rate. This is controlled in settings.py rather than using a scheduler since it changes accross multiple 
         training sets.
         - dataset: data used to train nnet
+        - num_of_data_workers: number of processes loading batches. Batches are loaded in this process if 0.
     """
-    # check if cuda is available
-    cuda = torch.cuda.is_available()
+    device = next(nnet.parameters()).device
+    nnet.train()
     old_params = nnet.parameters()
     avg_loss_per_epoch = []
     optimizer = torch.optim.SGD(old_params, lr=lr, momentum=0.9)
     criterion = AlphaLoss()
     train_set = BoardData(dataset=dataset)
+    # whole batches are sliced out of the dataset at once, pinned memory lets them be copied to the gpu asynchronously
     train_loader = DataLoader(
-        train_set, batch_size=BATCH_SIZE, shuffle=True, num_workers=0)
+        train_set, batch_size=None, sampler=batch_loader_sampler(train_set, BATCH_SIZE),
+        num_workers=num_of_data_workers, pin_memory=device.type == "cuda", persistent_workers=num_of_data_workers > 0)
 
     for epoch in range(epoch_start, epoch_end):
         total_loss = 0.0
         losses_per_batch = []  # loss per every 10 mini-batch
+        num_of_samples, data_time = 0, 0.0
+        epoch_start_time = time.perf_counter()
+        wait_start = epoch_start_time
         for idx, data in enumerate(train_loader):
-            s, p, v = data
-            if cuda:
-                s, p, v = s.cuda().float(), p.cuda().float(), v.cuda().float()
+            data_time += time.perf_counter() - wait_start
+            s, p, v = (x.to(device, non_blocking=True) for x in data)
             optimizer.zero_grad()
             # p_pred = Torch.Size([batch_size,73*8*8]), v_pred = Torch.Size([batch_size,1])
-            p_pred, v_pred = nnet(s.float())
-            # I don't think this next step is necessary but doesn't hurt to check
-            if cuda:
-                p_pred, v_pred = p_pred.cuda().float(), v_pred.cuda().float()
-            loss = criterion(p_pred, p.float(), v_pred, v.float())
+            p_pred, v_pred = nnet(s)
+            loss = criterion(p_pred, p, v_pred, v)
             loss.backward()
             total_loss += loss.item()
+            num_of_samples += len(s)
             if idx % 10 == 9:
                 print(
                     f"Epoch {epoch + 1}/{epoch_end} complete. Total loss is {total_loss/10}.")
                 losses_per_batch.append(total_loss)
                 total_loss = 0
+            wait_start = time.perf_counter()
+        epoch_time = time.perf_counter() - epoch_start_time
+        print(f"Epoch {epoch + 1}/{epoch_end}: {num_of_samples / epoch_time:.0f} samples/sec, "
+              f"{data_time:.2f}s of {epoch_time:.2f}s waiting on data.")
         avg_loss_per_epoch.append(
             sum(losses_per_batch)/(len(losses_per_batch)+1))
 
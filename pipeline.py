@@ -2,12 +2,18 @@ import torch
 import os
 
 from nnet.chess_net import ChessNet
-from settings import NUM_OF_TRAINING_CYCLES, NUM_OF_TRAINING_GAMES
+from settings import NUM_OF_TRAINING_CYCLES, NUM_OF_TRAINING_GAMES, NUM_OF_SELF_PLAY_WORKERS, \
+    SHARE_TRANSPOSITION_TABLE
 from nnet.train import train
 from mcts import self_play_one_game
+from transposition_table import TranspositionTable
+from nnet.replay_buffer import ReplayBuffer
+from nnet.export import export_inference_net, load_inference_net
+from self_play import parallel_self_play
 
 
-def train_model(nnet, num_of_training_games=NUM_OF_TRAINING_GAMES):
+def train_model(nnet, num_of_training_games=NUM_OF_TRAINING_GAMES, num_of_workers=NUM_OF_SELF_PLAY_WORKERS,
+                replay_buffer=None, inference_net_path=None):
     """
     Function to complete one sequence of the neural net training process.
 
@@ -20,11 +26,31 @@ def train_model(nnet, num_of_training_games=NUM_OF_TRAINING_GAMES):
         - nnet: nnet to train
         - path: to save the model to
         - num_of_training_games
+        - num_of_workers: number of processes to play the games on. Games are played in this process if 1
+        - replay_buffer: ReplayBuffer to save the games to. The nnet is then trained on its most recent games rather
+        than only on the games just played.
+        - inference_net_path: model saved by export_inference_net() with the weights of nnet, used for self-play
+        rather than converting nnet
     """
     dataset = []
-    for i in range(num_of_training_games):
-        data = self_play_one_game(nnet=nnet)
-        dataset += data
+    # batched leaf evaluation needs batch norm to use its running stats
+    nnet.eval()
+    if num_of_workers > 1:
+        dataset = parallel_self_play(
+            inference_net_path or nnet, num_of_training_games, num_of_workers, replay_buffer=replay_buffer)
+    else:
+        # the weights don't change during self-play so evaluations can be shared between games
+        transposition_table = TranspositionTable() if SHARE_TRANSPOSITION_TABLE else None
+        evaluator = load_inference_net(
+            inference_net_path) if inference_net_path else nnet.to_inference()
+        for i in range(num_of_training_games):
+            data = self_play_one_game(
+                nnet=evaluator, transposition_table=transposition_table)
+            dataset += data
+            if replay_buffer is not None:
+                replay_buffer.add_game(data)
+    if replay_buffer is not None:
+        dataset = replay_buffer.window()
     train(nnet, 0.9, dataset)
 
 
@@ -37,10 +63,16 @@ def pipeline(num_of_training_cycles=NUM_OF_TRAINING_CYCLES, nnet_params_path=Non
     base_path = "model_data/"
     if torch.cuda.is_available():
         nnet.cuda()
+    replay_buffer = ReplayBuffer()
+    inference_net_path = None
     for i in range(num_of_training_cycles):
         path = f"model_params_after_{i}_cycles.pt"
-        train_model(nnet)
+        train_model(nnet, replay_buffer=replay_buffer,
+                    inference_net_path=inference_net_path)
         torch.save(nnet.state_dict(), base_path + path)
+        # self-play of the next cycle loads this rather than rebuilding the net
+        inference_net_path = export_inference_net(
+            nnet, base_path + f"model_inference_after_{i}_cycles.pt")
 
 
 if __name__ == "__main__":
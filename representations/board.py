@@ -17,21 +17,50 @@ def encode_board(board: chess.Board()):
         chessboard x (P1 piece x P2 piece x Repetitions x 8-step history + colour x total move count x P1 castling x P2 castling x no progress count)
     The first 14 columns will be the board position at time t, the next 14 columns the board position at time t-1, etc..
     Once the 8 step history is complete, the extra variables will be added.
+    History steps from before the start of the move stack are left as zeros.
     """
     encoded = np.zeros([8, 8, 119]).astype(float)
 
     # encode historic boards. Make copy of board to safely remove from move stack
-    ply_count = board.ply()
     board_copy = board.copy()
     for i in range(8):
-        if ply_count - i >= 0:
-            encoded_position = encode_position(board_copy)
-            for (j, k, l), value in np.ndenumerate(encoded_position):
-                encoded[j][k][l+14*i] = value
-            if not ply_count - i <= 1:
-                board_copy.pop()
-
-    # add colour to encoding. Note 112 = 14*8
+        encoded[:, :, 14*i:14*(i+1)] = encode_position(board_copy)
+        if not board_copy.move_stack:
+            break
+        board_copy.pop()
+
+    encode_board_features(encoded, board)
+    return encoded
+
+
+def encode_next_board(encoded_board, board: chess.Board()):
+    """
+    A function to encode a board from the encoding of the board one move earlier.
+
+    Each step of the history is encoded from the perspective of the player to move in that position, so the 7 most
+    recent steps of the previous encoding can be shifted back one slot as they are and only the new position has to be
+    encoded.
+
+    Input: 
+        - encoded_board: encode_board() of the board before its last move
+        - chess.Board() after the move
+
+    Output: 
+        - same array as encode_board(board)
+    """
+    encoded = np.zeros([8, 8, 119]).astype(float)
+    encoded[:, :, 14:112] = encoded_board[:, :, :98]
+    encoded[:, :, :14] = encode_position(board)
+    encode_board_features(encoded, board)
+    return encoded
+
+
+def encode_board_features(encoded, board: chess.Board()):
+    """
+    A function to write the colour, move count, castling rights and no progress count planes of an encoded board.
+    Note 112 = 14*8 is the first plane after the 8-step history.
+    """
+    # add colour to encoding
     colour = 1 if board.turn else 0
     encoded[:, :, 112] = colour
 
@@ -51,8 +80,6 @@ def encode_board(board: chess.Board()):
     # add no progress count
     encoded[:, :, 118] = board.halfmove_clock
 
-    return encoded
-
 
 def decode_board(encoded_board):
     """
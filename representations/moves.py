@@ -3,6 +3,58 @@
 import chess
 import numpy as np
 
+# relative (file, rank) step of each move type from white's perspective. Black's moves are the same steps negated.
+DIRECTIONS = np.array([[-1, 1], [0, 1], [1, 1],
+                       [1, 0], [1, -1], [0, -1], [-1, -1], [-1, 0]])
+KNIGHT_DIRECTIONS = np.array([[-1, 2], [1, 2], [2, 1], [2, -1],
+                              [1, -2], [-1, -2], [-2, -1], [-2, 1]])
+UNDERPROMOTION_DIRECTIONS = np.array([[-1, 1], [0, 1], [1, 1]])
+UNDERPROMOTIONS = [chess.KNIGHT, chess.BISHOP, chess.ROOK]
+# position of each promotion piece type in the last axis of ACTION_INDEX. Queen promotions are plain queen moves.
+PROMOTION_SLOTS = np.array([0, 0, 1, 2, 3, 0, 0])
+
+
+def build_move_tables():
+    """
+    A function to build the lookup tables between moves and action indices for both colours.
+
+    Outputs:
+        - ACTION_INDEX: 2 x 64 x 64 x 4 array indexed by [turn, from square, to square, promotion slot] giving the
+        action index 8*73*file + 73*rank + move type of the move, or -1 if no action matches.
+        - MOVES: for each turn, a list of (from square, to square, promotion) for each of the 8*8*73 action indices,
+        or None if the action leaves the board.
+    """
+    action_index = np.full([2, 64, 64, 4], -1, dtype=np.int64)
+    moves = [[None]*(8*8*73), [None]*(8*8*73)]
+    for turn in [chess.BLACK, chess.WHITE]:
+        sign = 1 if turn == chess.WHITE else -1
+        for move_type in range(73):
+            promotion = None
+            if move_type < 56:
+                step = DIRECTIONS[move_type // 7] * (move_type % 7 + 1)
+            elif move_type < 64:
+                step = KNIGHT_DIRECTIONS[move_type - 56]
+            else:
+                step = UNDERPROMOTION_DIRECTIONS[(move_type - 64) % 3]
+                promotion = UNDERPROMOTIONS[(move_type - 64) // 3]
+            for start_file in range(8):
+                for start_rank in range(8):
+                    end_file = start_file + sign*step[0]
+                    end_rank = start_rank + sign*step[1]
+                    if not (0 <= end_file < 8 and 0 <= end_rank < 8):
+                        continue
+                    idx = (start_file*8 + start_rank)*73 + move_type
+                    from_square = chess.square(start_file, start_rank)
+                    to_square = chess.square(int(end_file), int(end_rank))
+                    action_index[int(turn), from_square, to_square,
+                                 PROMOTION_SLOTS[promotion or 0]] = idx
+                    moves[int(turn)][idx] = (
+                        from_square, to_square, promotion)
+    return action_index, moves
+
+
+ACTION_INDEX, MOVES = build_move_tables()
+
 
 def encode_actions(legal_moves: chess.Board().legal_moves, turn):
     """
@@ -19,13 +71,19 @@ def encode_actions(legal_moves: chess.Board().legal_moves, turn):
         9 features for underpromotion to knight, bishop or rook. Any other promotion will be assumed to be a queen
         This will however be converted to a 8*8*73 so that it is compatible with neural net output.
     """
-    encoded = np.zeros([8, 8, 73]).astype(float)
+    encoded = np.zeros([8*8*73]).astype(float)
+    encoded[encode_action_indices(legal_moves, turn)] = 1
+    return encoded
 
-    for move in legal_moves:
-        square_file, square_rank, repr = encode_move(move, turn=turn)
-        encoded[square_file][square_rank][repr] = 1
 
-    return encoded.reshape(-1)
+def encode_action_indices(legal_moves: chess.Board().legal_moves, turn):
+    """
+    A function to encode a set of moves into the array of their action indices, ie the positions of the 1s in
+    encode_actions().
+    """
+    moves = np.array([(move.from_square, move.to_square, move.promotion or 0)
+                     for move in legal_moves], dtype=np.int64).reshape(-1, 3)
+    return ACTION_INDEX[int(turn), moves[:, 0], moves[:, 1], PROMOTION_SLOTS[moves[:, 2]]]
 
 
 def encode_move(move, turn):
@@ -44,87 +102,9 @@ def encode_move(move, turn):
         - start_rank: piece starting rank
         - number between 0,..,72 according to the representation
     """
-    uci = move.uci()
-    start_file, start_rank = (chess.square_file(
-        move.from_square), chess.square_rank(move.from_square))
-    direction_counter = 0
-    counter = 0
-
-    # convert to coordinates
-    letter_converter = {"a": 1, "b": 2, "c": 3,
-                        "d": 4, "e": 5, "f": 6, "g": 7, "h": 8}
-    x_start, y_start = letter_converter[uci[0]], int(uci[1])
-    x_end, y_end = letter_converter[uci[2]], int(uci[3])
-
-    # work out direction
-    dx, dy = x_end - x_start, y_end - y_start
-
-    # change sign if colour is black
-    if turn == chess.BLACK:
-        dx = -dx
-        dy = -dy
-
-    if dx == - dy and dy > 0:
-        # NW
-        direction_counter = 0
-    elif dx == 0 and dy > 0:
-        # N
-        direction_counter = 1
-    elif dx == dy and dy > 0:
-        # NE
-        direction_counter = 2
-    elif dx > 0 and dy == 0:
-        # E
-        direction_counter = 3
-    elif dx == - dy and dy < 0:
-        # SE
-        direction_counter = 4
-    elif dx == 0 and dy < 0:
-        # S
-        direction_counter = 5
-    elif dx == dy and dy < 0:
-        # SW
-        direction_counter = 6
-    elif dx < 0 and dy == 0:
-        # W
-        direction_counter = 7
-    else:
-        # must be a knight move
-        counter = 56
-        if dx == -1 and dy == 2:
-            direction_counter = 0
-        elif dx == 1 and dy == 2:
-            direction_counter = 1
-        elif dx == 2 and dy == 1:
-            direction_counter = 2
-        elif dx == 2 and dy == -1:
-            direction_counter = 3
-        elif dx == 1 and dy == -2:
-            direction_counter = 4
-        elif dx == -1 and dy == -2:
-            direction_counter = 5
-        elif dx == -2 and dy == -1:
-            direction_counter = 6
-        elif dx == -2 and dy == 1:
-            direction_counter = 7
-        # identified type of move + direction so can return at this point
-        return start_file, start_rank, counter + direction_counter
-
-    # find length of move
-    counter = max(abs(dx), abs(dy)) - 1
-
-    # check if move is underpromotion
-    if uci[-1] == "n":
-        counter = 64
-        return start_file, start_rank, counter + direction_counter
-    elif uci[-1] == "b":
-        counter = 67
-        return start_file, start_rank, counter + direction_counter
-    elif uci[-1] == "r":
-        counter = 70
-        return start_file, start_rank, counter + direction_counter
-
-    return start_file, start_rank, direction_counter*7 + counter
+    idx = ACTION_INDEX[int(turn), move.from_square,
+                       move.to_square, PROMOTION_SLOTS[move.promotion or 0]]
+    return chess.square_file(move.from_square), chess.square_rank(move.from_square), int(idx % 73)
 
 
 def decode_actions(encoded_actions, turn):
@@ -135,49 +115,25 @@ def decode_actions(encoded_actions, turn):
     Outputs:
         - chess.Board().legal_moves
     """
-    encoded_actions = encoded_actions.reshape(8, 8, 73)
-    legal_moves = []
-    for (i, j, k), value in np.ndenumerate(encoded_actions):
-        if value == 1:
-            move = decode_move(i, j, k, turn)
-            legal_moves.append(move)
-
-    return legal_moves
+    return [decode_action(idx, turn) for idx in np.flatnonzero(encoded_actions.reshape(-1) == 1)]
 
 
 def decode_move(start_file, start_rank, move_type, turn):
-    direction_converter = np.array([[-1, 1], [0, 1], [1, 1],
-                                    [1, 0], [1, -1], [0, -1], [-1, -1], [-1, 0]])
-    knight_converter = np.array([[-1, 2], [1, 2], [2, 1], [2, -1],
-                                 [1, -2], [-1, -2], [-2, -1], [-2, 1]])
-    underpromotion_converter = np.array([[-1, 1], [0, 1], [1, 1]])
-
-    if turn == chess.BLACK:
-        direction_converter = - direction_converter
-        knight_converter = - knight_converter
-        underpromotion_converter = - underpromotion_converter
-    if move_type < 56:
-        # note can't calculate length straight away since 7 is a value here.
-        co_ord = move_type % 7
-        length = co_ord + 1
-        direction = 0
-        while (direction+1)*7 <= move_type:
-            direction += 1
-        end = [start_file, start_rank] + \
-            direction_converter[direction] * length
-        move = chess.Move(chess.square(start_file, start_rank), chess.square(
-            end[0], end[1]))
-    elif 56 <= move_type < 64:
-        direction = move_type % 8
-        end = [start_file, start_rank] + knight_converter[direction]
-        move = chess.Move(chess.square(start_file, start_rank),
-                          chess.square(end[0], end[1]))
-    else:
-        direction = (move_type - 64) % 3
-        piece = 1
-        while 64 + 3*piece <= move_type:
-            piece += 1
-        end = [start_file, start_rank] + underpromotion_converter[direction]
-        move = chess.Move(chess.square(start_file, start_rank),
-                          chess.square(end[0], end[1]), piece+1)
-    return move
+    """
+    A function to decode a move from its representation. See encode_move().
+    Outputs:
+        - chess.Move(), or None if the move leaves the board
+    """
+    return decode_action((start_file*8 + start_rank)*73 + move_type, turn)
+
+
+def decode_action(action_idx, turn):
+    """
+    A function to decode an action index 8*73*file + 73*rank + move type into a chess.Move().
+    Outputs:
+        - chess.Move(), or None if the move leaves the board
+    """
+    move = MOVES[int(turn)][action_idx]
+    if move is None:
+        return None
+    return chess.Move(*move)
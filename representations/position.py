@@ -8,6 +8,36 @@ from chess import square_file, square_rank, square
 def encode_position(board: chess.Board()):
     """
     A fucntion to encode the pieces on a chess.Board()
+    Input: 
+        -chess.Board()
+    Output: 
+        - 8 x 8 x (6 + 6 + 2) array representing: 
+        square file x square rank x (P1 piece + P2 piece + Repetitions)
+    The piece planes are unpacked from the board's bitboards in one go. Bit i of a bitboard is square i = 8*rank + file.
+    """
+    encoded = np.zeros([8, 8, 14]).astype(float)
+
+    # encode pieces
+    bitboards = np.array([board.pieces_mask(piece, colour) for colour in [board.turn, not board.turn]
+                          for piece in chess.PIECE_TYPES], dtype="<u8")
+    bits = np.unpackbits(bitboards.view(np.uint8), bitorder="little")
+    # piece x rank x file -> file x rank x piece
+    encoded[:, :, :12] = bits.reshape(12, 8, 8).transpose(2, 1, 0)
+
+    # encode repetitions. A position has always occured at least once
+    repetitions = 1
+    if board.is_repetition(2):
+        repetitions = 3 if board.is_repetition(3) else 2
+    encoded[:, :, 12] = repetitions
+    encoded[:, :, 13] = repetitions - 1
+
+    return encoded
+
+
+def encode_position_reference(board: chess.Board()):
+    """
+    A fucntion to encode the pieces on a chess.Board() square by square.
+    Kept as the reference the bitboard encode_position is tested and benchmarked against.
     Input: 
         -chess.Board()
     Output: 
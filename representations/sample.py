@@ -0,0 +1,131 @@
+# this file contains the encoder + decoder for a compact training sample
+
+import numpy as np
+import torch
+
+# one record per sample. The policy is stored separately as (indices, visits) since its length varies.
+SAMPLE_DTYPE = np.dtype([
+    # bitboard of each of the 12 piece planes of each of the 8 history steps. Bit i is square i = 8*rank + file
+    ("pieces", "<u8", (8, 12)),
+    # number of times the position of each history step has occured, 0 if the step is before the start of the game
+    ("repetitions", "u1", (8,)),
+    ("colour", "u1"),
+    ("ply", "<u2"),
+    # bits 0-3: P1 kingside, P1 queenside, P2 kingside, P2 queenside castling rights
+    ("castling", "u1"),
+    ("halfmove_clock", "<u2"),
+    ("value", "i1"),
+])
+# dense policies are stored as visit counts out of this many visits
+POLICY_VISIT_SCALE = 2**16 - 1
+
+# plane of the encoded board holding each of the 8 x 12 piece bitboards
+PIECE_PLANES = np.array([14*i + k for i in range(8) for k in range(12)])
+REPETITION_PLANES = np.arange(8) * 14 + 12
+CASTLING_PLANES = np.arange(114, 118)
+
+
+def encode_samples(states, policies, values):
+    """
+    A function to encode a batch of training samples.
+
+    Input:
+        - states: n x 8 x 8 x 119 encoded boards, see encode_board()
+        - policies: n x 4672 policy arrays, either visit counts or visit probabilities
+        - values: n game results
+
+    Output:
+        - samples: n array of SAMPLE_DTYPE
+        - policy_offsets: n+1 array. The policy of sample i is entries policy_offsets[i]:policy_offsets[i+1] of
+        policy_indices and policy_visits
+        - policy_indices: uint16 action indices
+        - policy_visits: uint16 visit counts
+    """
+    states = np.asarray(states, dtype=np.float32).reshape(-1, 8, 8, 119)
+    n = len(states)
+    samples = np.zeros([n], dtype=SAMPLE_DTYPE)
+
+    # file x rank x plane -> plane x (rank x file) so that bit order matches the square numbering
+    pieces = states[:, :, :, PIECE_PLANES].transpose(0, 3, 2, 1) != 0
+    bitboards = np.packbits(pieces.reshape(n, 96, 64),
+                            axis=2, bitorder="little")
+    samples["pieces"] = bitboards.copy().view("<u8").reshape(n, 8, 12)
+    samples["repetitions"] = states[:, 0, 0, REPETITION_PLANES]
+    samples["colour"] = states[:, 0, 0, 112]
+    samples["ply"] = states[:, 0, 0, 113]
+    samples["castling"] = (states[:, 0, 0, CASTLING_PLANES] != 0) @ (
+        1 << np.arange(4))
+    samples["halfmove_clock"] = states[:, 0, 0, 118]
+    samples["value"] = np.asarray(values).reshape(-1)
+
+    policies = np.asarray(policies, dtype=np.float64).reshape(n, 8*8*73)
+    if np.any(policies != np.rint(policies)):
+        # probabilities: keep the visit distribution, out of POLICY_VISIT_SCALE visits
+        totals = policies.sum(axis=1, keepdims=True)
+        policies = np.divide(policies, totals, out=np.zeros_like(
+            policies), where=totals > 0) * POLICY_VISIT_SCALE
+    policies = np.rint(policies)
+    rows, policy_indices = np.nonzero(policies)
+    policy_offsets = np.concatenate(
+        [[0], np.cumsum(np.bincount(rows, minlength=n))]).astype(np.int64)
+    policy_visits = policies[rows, policy_indices]
+    return samples, policy_offsets, policy_indices.astype(np.uint16), policy_visits.astype(np.uint16)
+
+
+def gather_policies(policy_offsets, rows):
+    """
+    A function to find the entries of the policies of some samples.
+
+    Output:
+        - positions of the policy entries of each row, one after the other
+        - length of each row's policy
+    """
+    starts = np.asarray(policy_offsets[rows])
+    lengths = np.asarray(policy_offsets[rows + 1]) - starts
+    ends = np.cumsum(lengths)
+    positions = np.arange(ends[-1] if len(ends) else 0) + \
+        np.repeat(starts - (ends - lengths), lengths)
+    return positions, lengths
+
+
+def decode_samples(samples, policy_offsets, policy_indices, policy_visits, rows=None):
+    """
+    A function to rebuild a batch of training samples. Arrays can be memory maps, only the rows needed are read.
+
+    Input:
+        - outputs of encode_samples()
+        - rows: samples to decode, all of them if None
+
+    Output:
+        - s: n x 8 x 8 x 119 float32 tensor, equal to encode_board() of the original board
+        - p: n x 4672 float32 tensor of visit probabilities
+        - v: n float32 tensor
+    """
+    rows = np.arange(len(samples)) if rows is None else np.asarray(rows)
+    records = np.asarray(samples[rows])
+    n = len(rows)
+    states = np.zeros([n, 8, 8, 119], dtype=np.float32)
+
+    bits = np.unpackbits(records["pieces"].reshape(n, 96).view(
+        np.uint8).reshape(n, 96, 8), axis=2, bitorder="little")
+    # plane x (rank x file) -> file x rank x plane
+    states[:, :, :, PIECE_PLANES] = bits.reshape(
+        n, 96, 8, 8).transpose(0, 3, 2, 1)
+    repetitions = records["repetitions"].astype(np.float32)
+    states[:, :, :, REPETITION_PLANES] = repetitions[:, None, None, :]
+    states[:, :, :, REPETITION_PLANES +
+           1] = np.maximum(repetitions - 1, 0)[:, None, None, :]
+    states[:, :, :, 112] = records["colour"][:, None, None]
+    states[:, :, :, 113] = records["ply"][:, None, None]
+    castling = (records["castling"][:, None] >> np.arange(4)) & 1
+    states[:, :, :, CASTLING_PLANES] = castling[:, None, None, :]
+    states[:, :, :, 118] = records["halfmove_clock"][:, None, None]
+
+    positions, lengths = gather_policies(policy_offsets, rows)
+    policies = np.zeros([n, 8*8*73], dtype=np.float32)
+    policies[np.repeat(np.arange(n), lengths), np.asarray(policy_indices[positions])] = \
+        np.asarray(policy_visits[positions])
+    policies /= np.maximum(policies.sum(axis=1, keepdims=True), 1)
+
+    values = records["value"].astype(np.float32)
+    return torch.from_numpy(states), torch.from_numpy(policies), torch.from_numpy(values)
@@ -0,0 +1,132 @@
+# this file contains the code to play self-play games over several processes
+import queue
+import random
+import chess
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from nnet.chess_net import ChessNet
+from nnet.inference_server import InferenceServer
+from nnet.export import load_inference_net
+from mcts import self_play_one_game
+from transposition_table import TranspositionTable
+from settings import NUM_OF_MCTS_SEARCHES, NUM_OF_SELF_PLAY_WORKERS, SELF_PLAY_THREADS_PER_WORKER, \
+    SELF_PLAY_INFERENCE_SERVER, SHARE_TRANSPOSITION_TABLE
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def self_play_worker(game_ids, nnet, seed, results, num_of_search_iters, starting_position):
+    """
+    Process target playing a list of self-play games.
+
+    Inputs:
+        - game_ids: ids of the games to play
+        - nnet: the ChessNet state dict, in shared memory and not to be modified, the path of a model saved by
+        export_inference_net(), or an InferenceClient
+        - seed: seed of the worker's random generators
+        - results: queue to put (game_id, [[s,p,v],...]) on as soon as a game is finished. (None, None) is put once all
+        games are played.
+        - num_of_search_iters, starting_position: see self_play_one_game
+    """
+    seed_everything(seed)
+    # every worker gets its own cores rather than all of them fighting over every core
+    torch.set_num_threads(SELF_PLAY_THREADS_PER_WORKER)
+    if isinstance(nnet, dict):
+        state_dict = nnet
+        nnet = ChessNet()
+        nnet.load_state_dict(state_dict)
+        nnet = nnet.to_inference()
+    elif isinstance(nnet, str):
+        nnet = load_inference_net(nnet)
+    transposition_table = TranspositionTable() if SHARE_TRANSPOSITION_TABLE else None
+    for game_id in game_ids:
+        data = self_play_one_game(nnet, num_of_search_iters, starting_position, verbose=False,
+                                  transposition_table=transposition_table)
+        # send states as numpy arrays rather than one shared memory handle per tensor
+        results.put((game_id, [[s.numpy(), p, v] for s, p, v in data]))
+    results.put((None, None))
+
+
+def parallel_self_play(nnet, num_of_games, num_of_workers=NUM_OF_SELF_PLAY_WORKERS, num_of_search_iters=NUM_OF_MCTS_SEARCHES,
+                       starting_position=chess.Board(), seed=None, use_inference_server=SELF_PLAY_INFERENCE_SERVER,
+                       replay_buffer=None):
+    """
+    A function to play self-play games over a pool of worker processes.
+
+    Inputs:
+        - nnet: neural net used to evaluate positions, or the path of a model saved by export_inference_net(). Every
+        worker gets a read-only copy of its weights.
+        - num_of_games: number of games to play
+        - num_of_workers: number of processes to play the games on
+        - num_of_search_iters, starting_position: see self_play_one_game
+        - seed: worker i seeds its random generators with seed + i. Picked at random if None.
+        - use_inference_server: evaluate the positions of every worker in shared batches on nnet in this process
+        rather than giving each worker its own copy of nnet
+        - replay_buffer: ReplayBuffer to add each game to as soon as it is received
+
+    Outputs:
+        - list of [s,p,v] in the same format as self_play_one_game, with the games in order of game id
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+    num_of_workers = min(num_of_workers, num_of_games)
+    ctx = mp.get_context("spawn")
+    server = None
+    if use_inference_server:
+        evaluator = load_inference_net(nnet) if isinstance(
+            nnet, str) else nnet.to_inference()
+        server = InferenceServer(evaluator, num_of_workers, ctx=ctx).start()
+        worker_nnets = server.clients
+    elif isinstance(nnet, str):
+        worker_nnets = [nnet] * num_of_workers
+    else:
+        state_dict = {name: tensor.detach().cpu().share_memory_()
+                      for name, tensor in nnet.state_dict().items()}
+        worker_nnets = [state_dict] * num_of_workers
+    results = ctx.Queue()
+    workers = [ctx.Process(target=self_play_worker,
+                           args=(list(range(i, num_of_games, num_of_workers)), worker_nnets[i], seed + i, results,
+                                 num_of_search_iters, starting_position),
+                           daemon=True)
+               for i in range(num_of_workers)]
+    for worker in workers:
+        worker.start()
+
+    games = {}
+    running = num_of_workers
+    try:
+        while running:
+            try:
+                game_id, data = results.get(timeout=1)
+            except queue.Empty:
+                if any(worker.exitcode not in [None, 0] for worker in workers):
+                    raise RuntimeError("A self-play worker died")
+                continue
+            if game_id is None:
+                running -= 1
+            else:
+                games[game_id] = [[torch.from_numpy(s), p, v]
+                                  for s, p, v in data]
+                if replay_buffer is not None:
+                    replay_buffer.add_game(games[game_id])
+                print(f"Game {len(games)}/{num_of_games} complete")
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        if server is not None:
+            server.stop()
+            print(
+                f"Inference server ran {server.num_of_batches} batches, mean batch size {server.mean_batch_size:.1f}")
+
+    dataset = []
+    for game_id in range(num_of_games):
+        dataset += games[game_id]
+    return dataset
@@ -10,7 +10,41 @@ L2_REGULARIZATION_PARAMETER = 10**(-4)
 LEARNING_RATE_SCHEDULE = {400: 10**(-2), 600: 10**(-3), sys.maxsize: 10**(-4)}
 # batch size to use in data loader
 BATCH_SIZE = 32
+# num of processes loading training batches. Batches are loaded in the training process if 0
+TRAINING_DATA_WORKERS = 0
 # num of training games to play before training nnet
 NUM_OF_TRAINING_GAMES = 1
+# c_init and c_base of the AlphaZero exploration rate C(s) = log((1 + N(s) + c_base) / c_base) + c_init
 EXPLORATION_RATE = 1
+EXPLORATION_BASE = 19652
 NUM_OF_TRAINING_CYCLES = 10
+# num of leaves collected per round of MCTS and evaluated in a single nnet call
+MCTS_BATCH_SIZE = 8
+# visits/loss added to an edge while a leaf below it waits for evaluation, so that a batch explores different leaves
+VIRTUAL_LOSS = 3
+# num of edges preallocated for an MCTS tree. The tree grows past this if needed
+TREE_EDGE_CAPACITY = 32 * 1024
+# num of processes playing self-play games. Games are played in the training process if 1
+NUM_OF_SELF_PLAY_WORKERS = 1
+# num of torch threads each self-play worker uses
+SELF_PLAY_THREADS_PER_WORKER = 1
+# evaluate the positions of all self-play workers in shared batches on one ChessNet in the training process
+SELF_PLAY_INFERENCE_SERVER = False
+# the inference server runs a batch once it has this many positions...
+INFERENCE_MAX_BATCH_SIZE = 64
+# ...or this many seconds after the batch's first request
+INFERENCE_MAX_WAIT = 0.002
+# evaluate self-play positions in bfloat16. Faster on cpus with bfloat16 support, at the cost of some precision
+INFERENCE_BFLOAT16 = False
+# start each self-play search from the subtree of the move played rather than from scratch
+REUSE_MCTS_TREE = True
+# memory budget of the cache of nnet evaluations used by self-play searches. 0 turns it off
+TRANSPOSITION_TABLE_SIZE_MB = 64
+# share one cache between all the games of a training cycle rather than using one per game
+SHARE_TRANSPOSITION_TABLE = True
+# directory the self-play samples are saved to
+REPLAY_BUFFER_PATH = "model_data/replay_buffer"
+# num of samples per replay buffer shard
+REPLAY_SHARD_SIZE = 4096
+# the nnet is trained on the samples of this many most recent games
+REPLAY_WINDOW_GAMES = 50
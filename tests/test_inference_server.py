@@ -0,0 +1,57 @@
+import pytest
+import threading
+import chess
+import torch
+
+from nnet.chess_net import ChessNet
+from nnet.inference_server import InferenceServer
+from representations.board import encode_board
+
+
+@pytest.fixture
+def chess_net():
+    return ChessNet().eval()
+
+
+@pytest.fixture
+def batch_of_states():
+    board = chess.Board()
+    states = []
+    for san in ["e4", "e5", "Nf3", "Nc6", "Bb5"]:
+        board.push_san(san)
+        states.append(torch.from_numpy(encode_board(board)).float())
+    return torch.stack(states)
+
+
+@pytest.mark.parametrize("client_batch_size", [2, 8])
+def test_client_matches_direct_call(chess_net, batch_of_states, client_batch_size):
+    with torch.no_grad():
+        p, v = chess_net(batch_of_states)
+    with InferenceServer(chess_net, 1, client_batch_size=client_batch_size) as server:
+        client_p, client_v = server.clients[0](batch_of_states)
+    assert torch.allclose(p, client_p, atol=1e-4)
+    assert torch.allclose(v, client_v, atol=1e-4)
+
+
+def test_concurrent_clients_share_batches(chess_net, batch_of_states):
+    num_of_clients = 4
+    results = [None] * num_of_clients
+    with torch.no_grad():
+        expected = [chess_net(batch_of_states[i:i+1])
+                    for i in range(num_of_clients)]
+
+    with InferenceServer(chess_net, num_of_clients, max_wait=0.5) as server:
+        def call(i):
+            results[i] = server.clients[i](batch_of_states[i:i+1])
+        threads = [threading.Thread(target=call, args=(i,))
+                   for i in range(num_of_clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert server.num_of_positions == num_of_clients
+    assert server.num_of_batches < num_of_clients
+    for (p, v), (expected_p, expected_v) in zip(results, expected):
+        assert torch.allclose(p, expected_p, atol=1e-4)
+        assert torch.allclose(v, expected_v, atol=1e-4)
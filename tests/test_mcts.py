@@ -4,7 +4,7 @@ from pytest_lazyfixture import lazy_fixture
 import numpy as np
 import torch
 
-from mcts import UCTNode, DummyNode, get_next_state
+from mcts import UCTNode, DummyNode, Tree, get_next_state, get_move, complete_one_mcts, get_policy
 from representations.board import encode_board, decode_board
 from nnet.chess_net import ChessNet
 
@@ -14,9 +14,16 @@ def uct_node_of_starting_board():
     return UCTNode(encode_board(chess.Board()), None, DummyNode())
 
 
+@pytest.fixture
+def expanded_uct_node_of_starting_board():
+    node = UCTNode(encode_board(chess.Board()), None, DummyNode())
+    node.expand(np.zeros([8*8*73]))
+    return node
+
+
 @pytest.fixture
 def chess_net():
-    return ChessNet()
+    return ChessNet().eval()
 
 
 @pytest.fixture
@@ -33,7 +40,8 @@ def e2e4_played_board():
 
 @pytest.mark.parametrize(
     'utc_node, output', [
-        (lazy_fixture('uct_node_of_starting_board'), np.zeros([8*8*73]))
+        (lazy_fixture('uct_node_of_starting_board'), np.zeros([0])),
+        (lazy_fixture('expanded_uct_node_of_starting_board'), np.zeros([20]))
     ]
 )
 def test_child_Q(utc_node, output):
@@ -42,7 +50,8 @@ def test_child_Q(utc_node, output):
 
 @pytest.mark.parametrize(
     'utc_node, output', [
-        (lazy_fixture('uct_node_of_starting_board'), np.zeros([8*8*73]))
+        (lazy_fixture('uct_node_of_starting_board'), np.zeros([0])),
+        (lazy_fixture('expanded_uct_node_of_starting_board'), np.zeros([20]))
     ]
 )
 def test_child_U(utc_node, output):
@@ -67,3 +76,128 @@ def test_best_child(utc_node, output):
 def test_get_next_state(state, action_idx, next_state):
     assert next_state == decode_board(
         get_next_state(state, action_idx))
+
+
+@pytest.mark.parametrize(
+    "num_of_searches, batch_size", [(10, 1), (10, 4), (3, 8)]
+)
+def test_complete_one_mcts_visit_counts(num_of_searches, batch_size, chess_net):
+    _, root = complete_one_mcts(
+        num_of_searches, chess_net, chess.Board(), batch_size)
+    # the first simulation expands the root so doesn't visit a child
+    assert root.number_of_visits == num_of_searches
+    assert root.child_number_of_visits.sum() == num_of_searches - 1
+
+
+def test_complete_one_mcts_reverts_virtual_loss(chess_net):
+    _, root = complete_one_mcts(20, chess_net, chess.Board(), 8)
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        for child in node.children.values():
+            if not child.is_terminal:
+                assert child.number_of_visits == child.child_number_of_visits.sum() + 1
+            nodes.append(child)
+
+
+def test_expand_allocates_one_edge_per_legal_move(expanded_uct_node_of_starting_board):
+    node = expanded_uct_node_of_starting_board
+    assert len(node.tree) == 20
+    assert set(node.child_actions) == set(node.legal_actions)
+    assert node.child_priors.sum() == pytest.approx(1)
+
+
+def test_tree_grows_past_capacity():
+    tree = Tree(capacity=4)
+    first = tree.allocate(np.arange(3))
+    second = tree.allocate(np.arange(3, 10))
+    assert (first, second) == (0, 3)
+    assert len(tree) == 10
+    assert list(tree.actions[:10]) == list(range(10))
+
+
+@pytest.mark.parametrize(
+    "num_of_searches", [10]
+)
+def test_get_policy_covers_root_edges(num_of_searches, chess_net):
+    _, root = complete_one_mcts(num_of_searches, chess_net, chess.Board())
+    policy = get_policy(root)
+    assert policy.shape == (8*8*73,)
+    assert set(np.flatnonzero(policy)) <= set(root.child_actions)
+
+
+@pytest.fixture
+def pawn_on_seventh_board():
+    return chess.Board("8/4P3/8/8/8/8/k7/7K w - - 0 1")
+
+
+@pytest.mark.parametrize(
+    "board, action_idx, move", [
+        (lazy_fixture('pawn_on_seventh_board'), 4*8*73 + 6*73 + 7,
+         chess.Move(chess.E7, chess.E8, chess.QUEEN)),
+        (lazy_fixture('pawn_on_seventh_board'), 4*8*73 + 6*73 + 65,
+         chess.Move(chess.E7, chess.E8, chess.KNIGHT)),
+        (lazy_fixture('e2e4_played_board'), 6*8*73 + 7*73 + 57,
+         chess.Move(chess.G8, chess.F6))
+    ]
+)
+def test_get_move(board, action_idx, move):
+    assert get_move(board, action_idx) == move
+
+
+def test_child_keeps_board_move_stack(chess_net):
+    _, root = complete_one_mcts(10, chess_net, chess.Board())
+    for action, child in root.children.items():
+        assert child.board.move_stack == [get_move(root.board, action)]
+        assert child.legal_actions is child.legal_actions
+
+
+def test_best_child_prefers_highest_prior(expanded_uct_node_of_starting_board):
+    node = expanded_uct_node_of_starting_board
+    node.number_of_visits = 1
+    priors = np.zeros([node.num_edges])
+    priors[3] = 1
+    node.child_priors = priors
+    assert node.best_child() == 3
+
+
+def test_best_child_breaks_ties_at_random(expanded_uct_node_of_starting_board):
+    node = expanded_uct_node_of_starting_board
+    node.number_of_visits = 1
+    node.child_priors = np.ones([node.num_edges]) / node.num_edges
+    assert len(set(node.best_child() for i in range(100))) > 1
+
+
+def test_best_child_uses_mean_value(expanded_uct_node_of_starting_board):
+    node = expanded_uct_node_of_starting_board
+    node.child_priors = np.ones([node.num_edges]) / node.num_edges
+    node.child_number_of_visits[:] = 10
+    node.child_total_value[5] = 5
+    node.number_of_visits = 200
+    assert node.best_child() == 5
+
+
+def test_make_root_keeps_subtree_statistics(chess_net):
+    _, root = complete_one_mcts(40, chess_net, chess.Board(), 4)
+    action, child = max(root.children.items(),
+                        key=lambda item: item[1].number_of_visits)
+    visits = child.number_of_visits
+    child_visits = child.child_number_of_visits.copy()
+    child.make_root()
+    assert isinstance(child.parent, DummyNode)
+    assert child.number_of_visits == visits
+    assert np.array_equal(child.child_number_of_visits, child_visits)
+    assert len(child.tree) < len(root.tree)
+    for grandchild in child.children.values():
+        assert child.tree.actions[grandchild.edge] == grandchild.move
+
+
+def test_complete_one_mcts_runs_remaining_searches_on_reused_root(chess_net):
+    best_move, root = complete_one_mcts(40, chess_net, chess.Board(), 4)
+    child = root.children[best_move]
+    child.make_root()
+    _, new_root = complete_one_mcts(
+        40, chess_net, child.board, 4, root=child)
+    assert new_root is child
+    assert new_root.number_of_visits == 40
+    assert new_root.child_number_of_visits.sum() == 39
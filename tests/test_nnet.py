@@ -4,7 +4,8 @@ import torch
 from pytest_lazyfixture import lazy_fixture
 
 from representations.board import encode_board
-from nnet.chess_net import ConvBlock, ResBlock, OutBlock, ChessNet
+from nnet.chess_net import ConvBlock, ResBlock, OutBlock, ChessNet, check_inference_net
+from nnet.export import export_inference_net, load_inference_net
 
 
 @pytest.fixture
@@ -60,3 +61,59 @@ def test_out_block_output_sizes(rand_tensor, output_sizes, out_block):
     p, v = out_block(rand_tensor)
     assert p.size() == output_sizes[0], "policy size is not right"
     assert v.size() == output_sizes[1], "value size is not right"
+
+
+@pytest.fixture
+def chess_net_with_batch_norm_stats():
+    torch.manual_seed(0)
+    nnet = ChessNet()
+    for module in nnet.modules():
+        if isinstance(module, torch.nn.BatchNorm2d):
+            module.running_mean.normal_()
+            module.running_var.uniform_(0.5, 2)
+            module.weight.data.uniform_(0.5, 1.5)
+            module.bias.data.normal_()
+    return nnet.eval()
+
+
+@pytest.mark.parametrize("bfloat16, tolerance", [(False, 1e-4), (True, 5e-2)])
+def test_inference_net_matches_eval_mode(chess_net_with_batch_norm_stats, starting_board_state, bfloat16, tolerance):
+    nnet = chess_net_with_batch_norm_stats
+    inference_net = nnet.to_inference(bfloat16=bfloat16)
+    s = torch.stack([starting_board_state, (torch.rand([8, 8, 119]) < 0.2).float()])
+    with torch.no_grad():
+        p, v = nnet(s)
+    p_inference, v_inference = inference_net(s)
+    assert p_inference.dtype == v_inference.dtype == torch.float32
+    assert p_inference.size() == p.size() and v_inference.size() == v.size()
+    assert (p - p_inference).abs().max() <= tolerance * p.abs().max()
+    assert (v - v_inference).abs().max() <= tolerance
+
+
+def test_inference_net_is_frozen(chess_net_with_batch_norm_stats):
+    nnet = chess_net_with_batch_norm_stats.train()
+    inference_net = nnet.to_inference()
+    assert nnet.training
+    assert not inference_net.training
+    assert not any(param.requires_grad for param in inference_net.parameters())
+    assert all(param.requires_grad for param in nnet.parameters())
+    assert not any(isinstance(module, torch.nn.BatchNorm2d) for module in inference_net.modules())
+
+
+def test_check_inference_net_catches_mismatch(chess_net_with_batch_norm_stats):
+    nnet = chess_net_with_batch_norm_stats
+    inference_net = nnet.to_inference()
+    inference_net.fc2_v.bias.data += 1000
+    with pytest.raises(ValueError):
+        check_inference_net(nnet, inference_net)
+
+
+def test_exported_net_matches_inference_net(chess_net_with_batch_norm_stats, tmp_path):
+    nnet = chess_net_with_batch_norm_stats
+    path = export_inference_net(nnet, str(tmp_path / "model.pt"))
+    exported = load_inference_net(path)
+    s = (torch.rand([3, 8, 8, 119]) < 0.2).float()
+    p, v = exported(s)
+    p_inference, v_inference = nnet.to_inference()(s)
+    assert p.size() == p_inference.size() and v.size() == v_inference.size()
+    assert torch.allclose(p, p_inference) and torch.allclose(v, v_inference)
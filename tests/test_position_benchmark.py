@@ -0,0 +1,32 @@
+import time
+import pytest
+
+from representations.position import encode_position, encode_position_reference
+from tests.test_representations import play_random_game
+
+
+def time_encoder(encoder, boards, repeats=5):
+    """
+    Returns the best time, over repeats, to encode every board.
+    """
+    best = float("inf")
+    for i in range(repeats):
+        start = time.perf_counter()
+        for board in boards:
+            encoder(board)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.fixture
+def corpus_of_boards():
+    return [board for seed in range(5) for board in play_random_game(seed)]
+
+
+def test_bitboard_encode_position_is_faster(corpus_of_boards):
+    reference = time_encoder(encode_position_reference, corpus_of_boards)
+    bitboard = time_encoder(encode_position, corpus_of_boards)
+    per_board = 1e6 / len(corpus_of_boards)
+    print(f"\nencode_position over {len(corpus_of_boards)} boards: reference {reference*per_board:.1f}us, "
+          f"bitboard {bitboard*per_board:.1f}us per board")
+    assert bitboard < reference
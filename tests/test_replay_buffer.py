@@ -0,0 +1,106 @@
+import pytest
+import chess
+import numpy as np
+import torch
+from pytest_lazyfixture import lazy_fixture
+from torch.utils.data import DataLoader
+
+from nnet.dataset import BoardData, batch_loader_sampler
+from nnet.replay_buffer import ReplayBuffer
+from representations.board import encode_board
+from tests.test_representations import play_random_game
+
+
+def random_game_samples(seed, num_of_plies=12):
+    """
+    Returns [s, p, v] samples in the format of self_play_one_game for the first plies of a random game.
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for board in play_random_game(seed)[:num_of_plies]:
+        policy = np.zeros([8*8*73])
+        policy[rng.choice(8*8*73, 5, replace=False)] = 0.2
+        samples.append([torch.from_numpy(encode_board(board)).float(), policy,
+                        int(rng.integers(-1, 2))])
+    return samples
+
+
+@pytest.fixture
+def games():
+    return [random_game_samples(seed) for seed in range(5)]
+
+
+@pytest.fixture
+def replay_buffer(tmp_path, games):
+    replay_buffer = ReplayBuffer(str(tmp_path), shard_size=16)
+    for game in games:
+        replay_buffer.add_game(game)
+    replay_buffer.flush()
+    return replay_buffer
+
+
+def test_samples_round_trip(replay_buffer, games):
+    window = replay_buffer.window(len(games))
+    samples = [sample for game in games for sample in game]
+    assert len(window) == len(samples)
+    for idx in [0, 15, 16, len(samples) - 1]:
+        s, p, v = window[idx]
+        assert torch.equal(s, samples[idx][0])
+        assert np.allclose(p.numpy(), samples[idx][1], atol=1e-3)
+        assert v == samples[idx][2]
+
+
+def test_get_batch_matches_indexing(replay_buffer, games):
+    window = replay_buffer.window(len(games))
+    indices = [40, 3, 17, 16, 59]
+    s, p, v = window.get_batch(indices)
+    for i, idx in enumerate(indices):
+        assert torch.equal(s[i], window[idx][0])
+        assert torch.equal(p[i], window[idx][1])
+
+
+def test_shards_are_fixed_size(replay_buffer):
+    assert [len(shard) for shard in replay_buffer.shards] == [16, 16, 16, 12]
+
+
+def test_window_keeps_most_recent_games(replay_buffer, games):
+    window = replay_buffer.window(2)
+    assert len(window) == len(games[-2]) + len(games[-1])
+    assert torch.equal(window[0][0], games[-2][0][0])
+
+
+def test_buffer_reopens_from_disk(replay_buffer, games, tmp_path):
+    reopened = ReplayBuffer(str(tmp_path), shard_size=16)
+    assert len(reopened) == len(replay_buffer)
+    assert reopened.add_game(games[0]) == len(games)
+    reopened.flush()
+    assert [len(shard) for shard in reopened.shards] == [16, 16, 16, 16, 8]
+
+
+def test_board_data_reads_window(replay_buffer, games):
+    board_data = BoardData(replay_buffer.window(len(games)))
+    assert len(board_data) == sum(len(game) for game in games)
+    assert torch.equal(board_data[5][0], games[0][5][0])
+
+
+@pytest.mark.parametrize("dataset", [lazy_fixture("replay_buffer"), lazy_fixture("games")])
+def test_board_data_batches_match_items(dataset, games):
+    if isinstance(dataset, ReplayBuffer):
+        dataset = dataset.window(len(games))
+    else:
+        dataset = [sample for game in dataset for sample in game]
+    board_data = BoardData(dataset)
+    s, p, v = board_data[[7, 2, 30]]
+    assert s.dtype == p.dtype == v.dtype == torch.float32
+    for i, idx in enumerate([7, 2, 30]):
+        assert torch.equal(s[i], board_data[idx][0].float())
+        assert torch.allclose(p[i], torch.as_tensor(board_data[idx][1]).float())
+
+
+def test_data_loader_workers_read_window(replay_buffer, games):
+    board_data = BoardData(replay_buffer.window(len(games)))
+    loader = DataLoader(board_data, batch_size=None, sampler=batch_loader_sampler(board_data, 16, shuffle=False),
+                        num_workers=1)
+    batches = list(loader)
+    assert [len(s) for s, p, v in batches] == [16, 16, 16, 12]
+    assert torch.equal(batches[1][0][0], board_data[16][0])
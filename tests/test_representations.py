@@ -1,11 +1,13 @@
 import pytest
 import chess
+import random
 import numpy as np
 from pytest_lazyfixture import lazy_fixture
 
-from representations.position import encode_position, decode_position
-from representations.board import encode_board, decode_board
-from representations.moves import encode_move, encode_actions, decode_actions, decode_move
+from representations.position import encode_position, encode_position_reference, decode_position
+from representations.board import encode_board, encode_next_board, decode_board
+from representations.moves import encode_move, encode_actions, encode_action_indices, decode_actions, decode_move, \
+    decode_action
 
 
 @pytest.fixture
@@ -130,6 +132,72 @@ def test_encode_board(encoded, raw):
     assert all([a == b] for a, b in zip(encode_board(raw), encoded))
 
 
+def play_random_game(seed, max_plies=120):
+    """
+    Returns the list of boards, with move stacks, seen in a random game.
+    """
+    rng = random.Random(seed)
+    board = chess.Board()
+    boards = [board.copy()]
+    while not board.is_game_over() and board.ply() < max_plies:
+        board.push(rng.choice(list(board.legal_moves)))
+        boards.append(board.copy())
+    return boards
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_encode_next_board_matches_encode_board(seed):
+    boards = play_random_game(seed)
+    for previous, board in zip(boards, boards[1:]):
+        assert np.array_equal(encode_next_board(
+            encode_board(previous), board), encode_board(board))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_encode_position_matches_reference(seed):
+    for board in play_random_game(seed):
+        assert np.array_equal(encode_position(board),
+                              encode_position_reference(board))
+
+
+@pytest.mark.parametrize("repeats", [0, 1, 2])
+def test_encode_position_repetitions_match_reference(repeats):
+    board = chess.Board()
+    for i in range(repeats):
+        for san in ["Nf3", "Nf6", "Ng1", "Ng8"]:
+            board.push_san(san)
+    assert np.array_equal(encode_position(board),
+                          encode_position_reference(board))
+    assert encode_position(board)[0, 0, 12] == repeats + 1
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_move_tables_round_trip_legal_moves(seed):
+    for board in play_random_game(seed):
+        indices = encode_action_indices(board.legal_moves, board.turn)
+        assert len(set(indices)) == board.legal_moves.count()
+        for move, idx in zip(board.legal_moves, indices):
+            assert encode_move(move, board.turn) == tuple(
+                np.unravel_index(idx, [8, 8, 73]))
+            decoded = decode_action(idx, board.turn)
+            if move.promotion == chess.QUEEN:
+                decoded.promotion = chess.QUEEN
+            assert decoded == move
+
+
+def test_decode_move_off_board():
+    # a1 moving one square "NW"
+    assert decode_move(0, 0, 0, chess.WHITE) is None
+
+
+def test_encode_board_history_order(e2e4_played_board):
+    encoded = encode_board(e2e4_played_board)
+    assert np.array_equal(encoded[:, :, :14],
+                          encode_position(e2e4_played_board))
+    assert np.array_equal(encoded[:, :, 14:28], encode_position(chess.Board()))
+    assert not encoded[:, :, 28:112].any()
+
+
 @pytest.mark.parametrize(
     "encoded, raw", [
         (lazy_fixture('encoded_starting_board'),
@@ -0,0 +1,57 @@
+import numpy as np
+import torch
+
+from representations.board import encode_board
+from representations.sample import encode_samples, decode_samples, SAMPLE_DTYPE
+from tests.test_representations import play_random_game
+
+
+def encoded_random_game(seed):
+    return np.stack([encode_board(board) for board in play_random_game(seed)]).astype(np.float32)
+
+
+def test_states_round_trip_exactly():
+    states = encoded_random_game(0)
+    policies = np.zeros([len(states), 8*8*73])
+    policies[:, 0] = 1
+    encoded = encode_samples(states, policies, np.ones(len(states)))
+    s, p, v = decode_samples(*encoded)
+    assert s.dtype == torch.float32
+    assert torch.equal(s, torch.from_numpy(states))
+
+
+def test_visit_counts_round_trip_exactly():
+    rng = np.random.default_rng(0)
+    policies = np.zeros([3, 8*8*73])
+    for policy in policies:
+        policy[rng.choice(8*8*73, 20, replace=False)] = rng.integers(1, 100, 20)
+    states = encoded_random_game(1)[:3]
+    encoded = encode_samples(states, policies, [1, 0, -1])
+    s, p, v = decode_samples(*encoded)
+    assert np.allclose(p.numpy(), policies / policies.sum(axis=1, keepdims=True))
+    assert v.tolist() == [1, 0, -1]
+
+
+def test_decode_rows():
+    states = encoded_random_game(2)
+    rng = np.random.default_rng(2)
+    policies = rng.integers(0, 3, [len(states), 8*8*73]) * (rng.random([len(states), 8*8*73]) < 0.01)
+    encoded = encode_samples(states, policies, np.zeros(len(states)))
+    rows = np.array([5, 1, 5, len(states) - 1])
+    s, p, v = decode_samples(*encoded, rows=rows)
+    all_s, all_p, all_v = decode_samples(*encoded)
+    assert torch.equal(s, all_s[rows])
+    assert torch.equal(p, all_p[rows])
+
+
+def test_sample_is_compact():
+    states = encoded_random_game(3)
+    policies = np.zeros([len(states), 8*8*73])
+    policies[:, :30] = 1 / 30
+    samples, policy_offsets, policy_indices, policy_visits = encode_samples(
+        states, policies, np.zeros(len(states)))
+    compact = samples.nbytes + policy_offsets.nbytes + \
+        policy_indices.nbytes + policy_visits.nbytes
+    dense = states.astype(np.float64).nbytes + policies.nbytes
+    assert SAMPLE_DTYPE.itemsize < 1024
+    assert compact * 50 < dense
@@ -0,0 +1,42 @@
+import pytest
+import chess
+import numpy as np
+import torch
+
+from mcts import self_play_one_game
+from nnet.chess_net import ChessNet
+from nnet.export import export_inference_net
+from self_play import parallel_self_play
+
+
+@pytest.fixture
+def chess_net():
+    return ChessNet().eval()
+
+
+@pytest.fixture
+def only_move_is_a_capture_board():
+    # white's only move is Kxb2 which leaves bare kings
+    return chess.Board("7k/8/8/8/8/8/1q6/K7 w - - 0 1")
+
+
+@pytest.mark.parametrize("use_inference_server", [False, True])
+def test_parallel_self_play_matches_serial_format(chess_net, only_move_is_a_capture_board, use_inference_server):
+    serial = self_play_one_game(
+        chess_net, 4, only_move_is_a_capture_board, verbose=False)
+    parallel = parallel_self_play(
+        chess_net, 3, 2, 4, only_move_is_a_capture_board, seed=0, use_inference_server=use_inference_server)
+    assert len(parallel) == 3 * len(serial) == 3
+    for (s, p, v), (serial_s, serial_p, serial_v) in zip(parallel, serial * 3):
+        assert isinstance(s, torch.Tensor)
+        assert torch.equal(s, serial_s)
+        assert type(p) == type(serial_p) and p.shape == serial_p.shape
+        assert v == serial_v == 0
+
+
+@pytest.mark.parametrize("use_inference_server", [False, True])
+def test_parallel_self_play_loads_exported_net(chess_net, only_move_is_a_capture_board, use_inference_server, tmp_path):
+    path = export_inference_net(chess_net, str(tmp_path / "model.pt"))
+    parallel = parallel_self_play(
+        path, 2, 2, 4, only_move_is_a_capture_board, seed=0, use_inference_server=use_inference_server)
+    assert len(parallel) == 2
@@ -0,0 +1,66 @@
+import pytest
+import chess
+import numpy as np
+
+from mcts import UCTNode, DummyNode, complete_one_mcts
+from nnet.chess_net import ChessNet
+from representations.board import encode_board
+from transposition_table import TranspositionTable, ENTRY_OVERHEAD_BYTES
+
+
+@pytest.fixture
+def chess_net():
+    return ChessNet().eval()
+
+
+def root_after(sans):
+    board = chess.Board()
+    for san in sans:
+        board.push_san(san)
+    return UCTNode(encode_board(board), None, DummyNode(), board=board)
+
+
+def test_transposition_key_matches_across_move_orders():
+    common = ["e3", "e6", "d3", "d6", "Be2", "Be7", "Bd2", "Bd7"]
+    # knight moves played in a different order before the 8 steps of history
+    first = root_after(["Nf3", "Nf6", "Nc3", "Nc6"] + common)
+    second = root_after(["Nc3", "Nc6", "Nf3", "Nf6"] + common)
+    # same final position but the knights move within the history
+    third = root_after(common[:6] + ["Nf3", "Nf6", "Nc3", "Nc6"] + common[6:])
+    assert first.board.board_fen() == third.board.board_fen()
+    assert first.transposition_key == second.transposition_key
+    assert first.transposition_key != third.transposition_key
+
+
+def test_lru_eviction_respects_memory_budget():
+    priors = np.zeros([20], dtype=np.float32)
+    entry_size = priors.nbytes + ENTRY_OVERHEAD_BYTES
+    table = TranspositionTable(max_size_mb=3.5 * entry_size / 1024**2)
+    for key in range(3):
+        table.put(key, priors, 0.0)
+    assert table.get(0) is not None
+    table.put(3, priors, 0.0)
+    assert len(table) == 3
+    assert table.get(1) is None
+    assert table.get(0) is not None
+    assert (table.hits, table.misses) == (2, 1)
+    assert table.nbytes <= table.max_bytes
+
+
+def test_search_uses_cached_evaluations(chess_net):
+    calls = []
+
+    def counting_net(s):
+        calls.append(s.reshape(-1, 8*8*119).size(0))
+        return chess_net(s)
+
+    table = TranspositionTable()
+    complete_one_mcts(20, counting_net, chess.Board(), 4,
+                      transposition_table=table)
+    first_calls = sum(calls)
+    assert len(table) == first_calls
+    calls.clear()
+    complete_one_mcts(20, counting_net, chess.Board(), 4,
+                      transposition_table=table)
+    assert table.hits > 0
+    assert sum(calls) < first_calls
@@ -0,0 +1,56 @@
+# this file contains the cache of nnet evaluations shared by MCTS searches
+import collections
+
+from settings import TRANSPOSITION_TABLE_SIZE_MB
+
+# rough python overhead of an entry on top of its priors: key tuple, OrderedDict link, value tuple and array header
+ENTRY_OVERHEAD_BYTES = 512
+
+
+class TranspositionTable():
+    """
+    LRU cache of nnet evaluations.
+
+    Keys are UCTNode.transposition_key, ie the Zobrist hashes of the position and its history plus the other inputs of
+    the nnet, so a position reached through different move orders is only evaluated once. Values are the policy priors
+    of the legal moves, in the order of UCTNode.legal_actions, and the value of the position.
+    The nnet weights must not change while a table is in use.
+    """
+
+    def __init__(self, max_size_mb=TRANSPOSITION_TABLE_SIZE_MB):
+        self.max_bytes = int(max_size_mb * 1024**2)
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        return self.hits / max(self.hits + self.misses, 1)
+
+    def get(self, key):
+        """
+        Outputs:
+            - (priors, value) or None if the key isn't in the table
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, priors, value):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        self.entries[key] = (priors, value)
+        self.nbytes += priors.nbytes + ENTRY_OVERHEAD_BYTES
+        # evict least recently used entries
+        while self.nbytes > self.max_bytes and self.entries:
+            old_priors, old_value = self.entries.popitem(last=False)[1]
+            self.nbytes -= old_priors.nbytes + ENTRY_OVERHEAD_BYTES